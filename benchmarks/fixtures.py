@@ -0,0 +1,118 @@
+'''
+	Pages for benchmarking the trackers offline.
+
+	Each carrier's page is made up, following the markup its tracker reads, and filled with
+	a given number of checkpoints. The same arguments always give the same page, so that runs
+	can be compared with each other. Pages are text; run.py hands them to a tracker in the
+	type its Get_Page stores.
+'''
+from datetime import datetime, timedelta
+import random
+
+TRACKING_NO = '1234567890'
+
+# Checkpoints in a small, a typical and a very long shipment history
+SIZES = {'small': 3, 'typical': 25, 'long': 600}
+
+LOCATIONS = ['MUMBAI HUB', 'DELHI GATEWAY', 'BANGALORE', 'PUNE', 'CHENNAI SERVICE CENTRE', 'KOLKATA']
+STATUSES = ['SHIPMENT PICKED UP', 'IN TRANSIT', 'ARRIVED AT HUB', 'SHIPMENT FURTHER CONNECTED',
+			'OUT FOR DELIVERY', 'CONSIGNEE NOT AVAILABLE']
+
+def checkpoints(count,seed):
+	'''
+		Yields (date, status, location) for count checkpoints, oldest first
+	'''
+	rand = random.Random(seed)
+	date = datetime(2016,1,4,8,0)
+	for _ in range(count):
+		date += timedelta(minutes=rand.randint(20,600))
+		yield date, rand.choice(STATUSES), rand.choice(LOCATIONS)
+
+def bluedart(count):
+	cell = '<td align="LEFT"><font size="1">{}</font></td>'
+	rows = ''.join('<tr>' + ''.join(cell.format(text) for text in (location, status, date.strftime('%d-%b-%Y'), date.strftime('%H:%M'))) + '</tr>'
+				   for date, status, location in checkpoints(count,1))
+	header = '<tr>' + ''.join(cell.format(text) for text in ('Location', 'Details', 'Date', 'Date')) + '</tr>'
+
+	return ('<html><head><title>Bluedart Tracking</title></head><body>'
+			'<table width="100%"><tr><td><b>Waybill No: {}</b></td></tr></table>'
+			'<table border="0" cellpadding="2">{}{}</table>'
+			'<p>SHIPMENT DELIVERED</p></body></html>').format(TRACKING_NO,header,rows)
+
+def aramex(count):
+	row = ('<div class="fullWidth {} leftFloat bottomGreyBorder"><div class="leftFloat thirdWidth">{}</div>'
+		   '<div class="leftFloat shipmentSummaryLabel">{}</div>'
+		   '<div class="leftFloat shipmentHistoryActivityLabel">{}</div></div>')
+	rows = ''.join(row.format('odd' if index % 2 else 'even', location, date.strftime('%d-%b-%Y %H:%M'), status)
+				   for index, (date, status, location) in enumerate(checkpoints(count,2)))
+
+	return ('<html><body><div id="shipment">{}<div>Current Status '
+			'<span id="spnCurrentStatusValue">Delivered</span></div>{}</div></body></html>').format(TRACKING_NO,rows)
+
+def dhl(count):
+	sections = []
+	day = None
+	for date, status, location in checkpoints(count,3):
+		if date.date() != day:
+			day = date.date()
+			sections.append('<thead><tr><th colspan="2">{}</th><th>Location</th><th>Time</th></tr></thead>'.format(date.strftime('%A, %B %d, %Y')))
+		sections.append('<tbody><tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr></tbody>'.format(len(sections), status, location, date.strftime('%H:%M')))
+
+	return ('<html><body><h2>Waybill: {}</h2><p>Signed for by: R KUMAR</p>'
+			'<table class="result-checkpoints">{}</table></body></html>').format(TRACKING_NO,''.join(sections))
+
+def skynet(count):
+	row = '<tr class="{}"><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>'
+	rows = ''.join(row.format('gridAltItem' if index % 2 else 'gridItem', date.strftime('%d %b %Y'), date.strftime('%H:%M'), status, location)
+				   for index, (date, status, location) in enumerate(checkpoints(count,4)))
+
+	return ('<html><body><table id="ctl00_ContentPlaceHolder1_gvTrack"><tr class="gridHeader"><th>Date</th>'
+			'<th>Time</th><th>Status</th><th>Location</th></tr>{}</table><p>Delivered</p></body></html>').format(rows)
+
+def overnite(count):
+	table = '<table cellpadding="1" cellspacing="1" border="1" align="center" style="width:800px;border-color:#034291;">{}</table>'
+	row = '<tr><td>{}</td><td><a href="#">{}</a></td><td><span>{}</span></td></tr>'
+	rows = ''.join(row.format(date.strftime('%A, %B %d, %Y'), location, status) for date, status, location in checkpoints(count,5))
+
+	return ('<html><body>' + table.format('<tr><td>AWB No</td><td>{}</td></tr>'.format(TRACKING_NO)) +
+			table.format('<tr><th>Date</th><th>Location</th><th>Status</th></tr>' + rows) +
+			'<p>Delivered on</p></body></html>')
+
+def ecomm(count):
+	row = '<tr><td>{} ,  {}</td><td>{}</td></tr>'
+	history = list(checkpoints(count,6))
+	rows = ''.join(row.format(date.strftime('%d-%m-%Y | %H:%M:%S'), location, status) for date, status, location in reversed(history))
+
+	# The page leaves its paragraphs open, as the live one does
+	return ('<html><body><p>AWB Number: {}<p>'
+			'<table class="table table-bordered"><thead><tr><th>Date | Location</th><th>Status</th></tr></thead>'
+			'<tbody>{}</tbody></table></body></html>').format(TRACKING_NO,rows)
+
+def gati(count):
+	row = ('<ROW><INTRANSIT_DATE>{}</INTRANSIT_DATE><INTRANSIT_TIME>{}</INTRANSIT_TIME>'
+		   '<INTRANSIT_LOCATION>{}</INTRANSIT_LOCATION><INTRANSIT_STATUS>{}</INTRANSIT_STATUS></ROW>')
+	rows = ''.join(row.format(date.strftime('%d-%b-%Y'), date.strftime('%H:%M'), location, status) for date, status, location in checkpoints(count,7))
+
+	return ('<?xml version="1.0" encoding="UTF-8"?><Gatiresponse><result>successful</result>'
+			'<dktinfo><DOCKET_NUMBER>{}</DOCKET_NUMBER><DOCKET_STATUS>In Transit</DOCKET_STATUS>'
+			'<TRANSIT_DTLS>{}</TRANSIT_DTLS></dktinfo></Gatiresponse>').format(TRACKING_NO,rows)
+
+# A batch's tracking numbers, one of them the start of another, as with consecutive waybills
+BATCH_NOS = ['12345678901','1234567890','1234567891']
+
+def batch(carrier,count):
+	'''
+		The page a carrier that tracks in batches returns for all of BATCH_NOS: each shipment's
+		page in turn, with count checkpoints
+	'''
+	return ''.join(pages[carrier](count).replace(TRACKING_NO,tracking_no) for tracking_no in BATCH_NOS)
+
+pages = {
+	'bluedart': bluedart,
+	'aramex': aramex,
+	'dhl': dhl,
+	'skynet': skynet,
+	'overnite': overnite,
+	'ecomm': ecomm,
+	'gati': gati,
+}
@@ -0,0 +1,170 @@
+'''
+	Benchmarks Extract_Checkpoints of every tracker on the pages in fixtures.py, offline.
+
+		python benchmarks/run.py                          # all carriers, sizes and parser backends
+		python benchmarks/run.py --carrier gati --size long
+		python benchmarks/run.py --save baseline.json     # keep the results to compare against
+		python benchmarks/run.py --compare baseline.json  # fails if anything got slower than --tolerance
+
+	For each case it reports pages/sec, checkpoints/sec and the peak memory of one extraction.
+	The carriers that track in batches are first checked to split fixtures.batch right.
+'''
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from timeit import default_timer
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trackit import parsers, trackers
+import fixtures
+
+TRACKERS = {
+	'bluedart': trackers.BluedartTracker,
+	'aramex': trackers.AramexTracker,
+	'dhl': trackers.DHLTracker,
+	'skynet': trackers.Skynet_Tracker,
+	'overnite': trackers.Overnite_Tracker,
+	'ecomm': trackers.Ecomm_Tracker,
+	'gati': trackers.Gati_Tracker,
+}
+
+def as_fetched(tracker_class,page):
+	'''
+		The page in the type Get_Page stores it in: the text of a browser's page or of a tracker
+		with page_as_text, the raw bytes otherwise
+	'''
+	if tracker_class.page_as_text or tracker_class.Get_Page is not trackers.Tracker.Get_Page:
+		return page
+	return page.encode('utf-8')
+
+def extract(tracker_class,page,backend):
+	tracker = tracker_class(fixtures.TRACKING_NO)
+	tracker.parser_backend = backend
+	tracker.page = page		# injected, nothing goes over the network
+	tracker.Extract_Checkpoints()
+	return tracker
+
+def bench(carrier,size,backend,min_time):
+	'''
+		Extracts the page over and over for at least min_time seconds
+	'''
+	tracker_class = TRACKERS[carrier]
+	page = as_fetched(tracker_class,fixtures.pages[carrier](fixtures.SIZES[size]))
+
+	extract(tracker_class,page,backend)		# warm up, compiling selectors and the like
+
+	# Once under tracemalloc for the peak memory, which slows it down too much to be timed
+	tracemalloc.start()
+	checkpoints = len(extract(tracker_class,page,backend).tracking_data)
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+
+	runs = 0
+	start = default_timer()
+	while True:
+		extract(tracker_class,page,backend)
+		runs += 1
+		elapsed = default_timer() - start
+		if elapsed >= min_time:
+			break
+
+	return {
+		'pages_per_sec': runs / elapsed,
+		'checkpoints_per_sec': runs * checkpoints / elapsed,
+		'peak_memory_kb': peak / 1024.0,
+		'checkpoints': checkpoints,
+		'page_kb': len(page) / 1024.0,
+	}
+
+def check_batch(tracker_class,backend):
+	'''
+		Splits the batch page of a carrier that tracks in batches and extracts each shipment's
+		part. Returns the tracking numbers that didn't get their own checkpoints
+	'''
+	count = fixtures.SIZES['small']
+	page = as_fetched(tracker_class,fixtures.batch(tracker_class.carrier,count))
+	sections = tracker_class.Split_Batch_Page(page,fixtures.BATCH_NOS)
+
+	wrong = []
+	for tracking_no in fixtures.BATCH_NOS:
+		tracker = tracker_class(tracking_no)
+		tracker.parser_backend = backend
+		tracker.page = sections.get(tracking_no)
+		try:
+			tracker.Extract_Checkpoints()
+		except Exception:
+			wrong.append(tracking_no)
+			continue
+		if len(tracker.tracking_data) != count:
+			wrong.append(tracking_no)
+	return wrong
+
+def compare(results,baseline,tolerance):
+	'''
+		Returns the cases whose pages/sec fell by more than tolerance from the baseline
+	'''
+	regressions = []
+	for case, result in sorted(results.items()):
+		if case not in baseline:
+			continue
+		before = baseline[case]['pages_per_sec']
+		change = result['pages_per_sec'] / before - 1
+		if change < -tolerance:
+			regressions.append((case,before,result['pages_per_sec'],change))
+	return regressions
+
+def main(argv=None):
+	argparser = argparse.ArgumentParser(description='Benchmark the checkpoint extraction of the trackers offline')
+	argparser.add_argument('--carrier',action='append',choices=sorted(TRACKERS),help='carriers to run (default: all)')
+	argparser.add_argument('--size',action='append',choices=sorted(fixtures.SIZES),help='shipment history sizes to run (default: all)')
+	argparser.add_argument('--backend',action='append',choices=parsers.backends,help='parser backends to run (default: all installed)')
+	argparser.add_argument('--min-time',type=float,default=1.0,help='seconds to run each case for')
+	argparser.add_argument('--save',metavar='FILE',help='write the results to FILE as JSON')
+	argparser.add_argument('--compare',metavar='FILE',help='compare against results saved earlier')
+	argparser.add_argument('--tolerance',type=float,default=0.10,help='slowdown in pages/sec allowed by --compare')
+	args = argparser.parse_args(argv)
+
+	backends = args.backend or [backend for backend in parsers.backends if parsers.installed(backend)]
+	results = {}
+
+	wrong_batches = False
+	for carrier in args.carrier or sorted(TRACKERS):
+		if TRACKERS[carrier].max_batch_size == 1:
+			continue
+		for backend in backends:
+			wrong = check_batch(TRACKERS[carrier],backend)
+			if wrong:
+				print('BATCH SPLIT {}/{}: wrong part for {}'.format(carrier,backend,', '.join(wrong)))
+				wrong_batches = True
+
+	print('{:<32} {:>10} {:>14} {:>10} {:>8}'.format('case','pages/s','checkpoints/s','peak KB','page KB'))
+	for carrier in args.carrier or sorted(TRACKERS):
+		for size in args.size or sorted(fixtures.SIZES,key=fixtures.SIZES.get):
+			for backend in backends:
+				case = '/'.join((carrier,size,backend))
+				result = results[case] = bench(carrier,size,backend,args.min_time)
+				print('{:<32} {:>10.1f} {:>14.0f} {:>10.1f} {:>8.1f}'.format(case,result['pages_per_sec'],
+					result['checkpoints_per_sec'],result['peak_memory_kb'],result['page_kb']))
+				sys.stdout.flush()
+
+	if args.save:
+		with open(args.save,'w') as saved:
+			json.dump(results,saved,indent=1,sort_keys=True)
+
+	if args.compare:
+		with open(args.compare) as saved:
+			baseline = json.load(saved)
+		regressions = compare(results,baseline,args.tolerance)
+		for case, before, after, change in regressions:
+			print('REGRESSION {}: {:.1f} -> {:.1f} pages/s ({:+.0%})'.format(case,before,after,change))
+		if regressions:
+			return 1
+		print('No regressions against {}'.format(args.compare))
+
+	return 1 if wrong_batches else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -16,5 +16,21 @@ setup(
       "selenium==2.48.0",
       "requests==2.20.0",
       "python-dateutil==2.4.2",
-  ]
+  ],
+  extras_require={
+      "async": ["aiohttp"],
+      "fast": ["lxml"],
+  },
+  entry_points={
+      "console_scripts": ["trackit = trackit.cli:main"],
+      "trackit.carriers": [
+          "bluedart = trackit.trackers:BluedartTracker",
+          "aramex = trackit.trackers:AramexTracker",
+          "dhl = trackit.trackers:DHLTracker",
+          "skynet = trackit.trackers:Skynet_Tracker",
+          "overnite = trackit.trackers:Overnite_Tracker",
+          "ecomm = trackit.trackers:Ecomm_Tracker",
+          "gati = trackit.trackers:Gati_Tracker",
+      ],
+  }
 )
\ No newline at end of file
@@ -0,0 +1,210 @@
+'''
+	Asyncio counterpart of Tracker.Get_Tracking_Data.
+
+	The HTTP trackers' requests are sent with aiohttp, so a single event loop can keep
+	thousands of lookups in flight. Trackers that drive a browser (Aramex, DHL) have no
+	request to send and are run in the loop's default executor instead.
+
+		>>> engine = AsyncEngine(limits={'bluedart': 50})
+		>>> trackers = await engine.track_many([BluedartTracker(no) for no in numbers])
+'''
+import asyncio
+
+try:
+	import aiohttp
+except ImportError:
+	aiohttp = None
+
+class AsyncEngine(object):
+	'''
+		Fetches pages for many trackers at once, with at most limits[carrier] (or
+		default_limit) lookups of a carrier in flight at any time.
+	'''
+
+	def __init__(self,limits=None,default_limit=100):
+		if aiohttp is None:
+			raise ImportError('aiohttp is needed for tracking with asyncio: pip install aiohttp')
+
+		self.limits = dict(limits or {})
+		self.default_limit = default_limit
+		self.loop = None
+		self.sessions = {}
+		self.semaphores = {}
+		self.keeper = None
+
+	def bind_loop(self):
+		'''
+			Sessions and semaphores belong to the loop they were made in, start afresh on a new loop.
+			The sessions made in a loop are closed when it shuts down, as asyncio.run does at its end
+		'''
+		loop = asyncio.get_event_loop()
+		if loop is not self.loop:
+			self.loop = loop
+			self.sessions = {}
+			self.semaphores = {}
+			self.keeper = loop.create_task(self.keep(self.sessions))
+
+	async def keep(self,sessions):
+		'''
+			Waits till cancelled, by the loop shutting down or the engine being closed, then closes sessions
+		'''
+		try:
+			await asyncio.get_event_loop().create_future()
+		finally:
+			for session in list(sessions.values()):
+				await session.close()
+
+	def semaphore(self,carrier):
+		self.bind_loop()
+		if carrier not in self.semaphores:
+			self.semaphores[carrier] = asyncio.Semaphore(self.limits.get(carrier,self.default_limit))
+		return self.semaphores[carrier]
+
+	def session(self,carrier):
+		self.bind_loop()
+		if carrier not in self.sessions:
+			limit = self.limits.get(carrier,self.default_limit)
+			self.sessions[carrier] = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=limit))
+		return self.sessions[carrier]
+
+	async def get_page(self,tracker):
+		'''
+			Fetches the page of the tracker, like tracker.Get_Page but without blocking the loop
+		'''
+		loop = asyncio.get_event_loop()
+
+		for attempt in (1,2):
+			try:
+				if tracker.form_session is not None:
+					# Building the request may fetch the form state first, which blocks
+					method, url, options = await loop.run_in_executor(None,tracker.Build_Request)
+				else:
+					method, url, options = tracker.Build_Request()
+			except NotImplementedError:
+				# A browser driven tracker, let a thread wait on it
+				await loop.run_in_executor(None,tracker.Get_Page)
+				return
+
+			options = dict(tracker.conditional(options))
+			if not options.pop('verify',True):
+				options['ssl'] = False
+			if tracker.request_timeout is not None:
+				options['timeout'] = aiohttp.ClientTimeout(total=tracker.request_timeout)
+
+			session = self.session(tracker.carrier)
+			async with session.request(method,url,**options) as response:
+				page = await response.read()
+				text = page.decode(response.get_encoding(),'replace')
+
+				if tracker.form_session is not None and attempt == 1 and tracker.form_session.rejected(text):
+					# The site turned down the form state or session, post again with fresh ones
+					tracker.form_session.invalidate(tracker.form_state)
+					continue
+
+				if response.status == 304:
+					return		# Not Modified, tracker.page is still the page
+
+				if response.status == 429 or response.status >= 500:
+					response.raise_for_status()
+				tracker.page = text if tracker.page_as_text else page
+				tracker.keep_validators(response.headers)
+				return
+
+	async def paced_get_page(self,tracker):
+		'''
+			get_page once the carrier's limiter lets it through, like Limiter.request but
+			waiting for the rate limit without blocking the loop. The engine's limits stand
+			in for the limiter's concurrency cap
+		'''
+		if tracker.driver_pool is not None:
+			# A browser driven tracker leases its browser in a thread first, then waits on the limiter there
+			await asyncio.get_event_loop().run_in_executor(None,tracker.paced_get_page)
+			return
+
+		limiter = tracker.limiter
+		limiter.breaker.allow(tracker.carrier)
+
+		try:
+			if limiter.bucket is not None:
+				await asyncio.sleep(limiter.bucket.reserve())
+			async with self.semaphore(tracker.carrier):
+				await self.get_page(tracker)
+		except Exception:
+			limiter.breaker.failure()
+			raise
+		except BaseException:
+			limiter.breaker.abandon()		# cancelled
+			raise
+		else:
+			limiter.breaker.success()
+
+	async def get_tracking_data(self,tracker):
+		'''
+			Awaitable Get_Tracking_Data. Returns the tracker
+		'''
+		tracker.timings = {}
+		if tracker.from_cache():
+			return tracker
+
+		if tracker.page_archive is not None and tracker.archive_replay:
+			tracker.fetch_page()		# read from the archive, nothing to wait for
+		else:
+			with tracker.timed('fetch'):
+				await self.paced_get_page(tracker)
+			tracker.count_page()
+			tracker.archive_page()
+
+		tracker.extract_changed()
+		tracker.cache_result()
+		return tracker
+
+	async def track_many(self,trackers):
+		'''
+			Tracks all the trackers concurrently and returns them in the same order.
+			A shipment that could not be tracked has its exception stored in tracker.error
+		'''
+		async def track(tracker):
+			try:
+				await self.get_tracking_data(tracker)
+			except Exception as e:
+				tracker.error = e
+			return tracker
+
+		return await asyncio.gather(*[track(tracker) for tracker in trackers])
+
+	async def close(self):
+		'''
+			Closes the sessions and the connections they hold
+		'''
+		sessions = list(self.sessions.values())
+		keeper = self.keeper
+		self.loop = None		# used again, the engine starts afresh
+		self.sessions = {}
+		self.keeper = None
+		for session in sessions:
+			await session.close()
+		if keeper is not None:
+			keeper.cancel()
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self,*exc_info):
+		await self.close()
+
+engine = None
+
+def default_engine():
+	'''
+		The engine used when none is passed in, created on first use
+	'''
+	global engine
+	if engine is None:
+		engine = AsyncEngine()
+	return engine
+
+async def track_many(trackers,engine=None):
+	'''
+		Tracks all the trackers concurrently, see AsyncEngine.track_many
+	'''
+	return await (engine or default_engine()).track_many(trackers)
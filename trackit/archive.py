@@ -0,0 +1,152 @@
+'''
+	An archive of the raw pages fetched by the trackers, for parsing them again later
+	without going to the carriers' sites.
+
+		>>> archive = PageArchive('pages/')
+		>>> Tracker.page_archive = archive                # every page fetched is archived
+		...
+		>>> for tracker in archive.replay(BluedartTracker):
+		...     print(tracker.tracking_no, tracker.status)
+
+	Pages are stored compressed and content addressed, so a page that didn't change since
+	the last fetch takes no more space. The archive is a directory of two files:
+		pages.pack	the compressed pages, one after the other
+		index		one JSON line per page stored and per fetch, in the order they happened
+	and is read through a memory map of the pack.
+'''
+from threading import Lock
+from time import time
+import hashlib
+import json
+import mmap
+import os
+import zlib
+
+class PageArchive(object):
+	'''
+		Stores the pages fetched for each (carrier, tracking_no) in the directory at path
+	'''
+
+	def __init__(self,path,compression=6):
+		self.path = path
+		self.compression = compression
+		self.blobs = {}			# hash -> (offset, size, is_text)
+		self.fetches = {}		# (carrier, tracking_no) -> [(time, hash)], oldest first
+		self.lock = Lock()
+		self.map = None
+
+		if not os.path.isdir(path):
+			os.makedirs(path)
+
+		self.index_path = os.path.join(path,'index')
+		self.pack_path = os.path.join(path,'pages.pack')
+
+		if os.path.exists(self.index_path):
+			with open(self.index_path) as index:
+				for line in index:
+					self.load(json.loads(line))
+
+		self.index = open(self.index_path,'a')
+		self.pack = open(self.pack_path,'ab')
+
+	def load(self,record):
+		if 'blob' in record and 'offset' in record:
+			self.blobs[record['blob']] = (record['offset'],record['size'],record['text'])
+		else:
+			key = (record['carrier'],record['tracking_no'])
+			self.fetches.setdefault(key,[]).append((record['time'],record['blob']))
+
+	def write(self,record):
+		self.index.write(json.dumps(record,sort_keys=True) + '\n')
+		self.load(record)
+
+	def store(self,carrier,tracking_no,page,fetched_at=None):
+		'''
+			Archives a page fetched for tracking_no. Returns the page's hash
+		'''
+		is_text = not isinstance(page,bytes)
+		data = page.encode('utf-8') if is_text else page
+		blob = hashlib.sha1(data).hexdigest()
+
+		with self.lock:
+			if blob not in self.blobs:
+				compressed = zlib.compress(data,self.compression)
+				self.pack.seek(0,os.SEEK_END)
+				offset = self.pack.tell()
+				self.pack.write(compressed)
+				self.pack.flush()
+				self.write({'blob': blob, 'offset': offset, 'size': len(compressed), 'text': is_text})
+
+			self.write({'carrier': carrier, 'tracking_no': tracking_no, 'blob': blob,
+						'time': time() if fetched_at is None else fetched_at})
+			self.index.flush()
+
+		return blob
+
+	def read(self,blob):
+		'''
+			Returns the page with the given hash
+		'''
+		offset, size, is_text = self.blobs[blob]
+
+		with self.lock:
+			if self.map is None or offset + size > len(self.map):
+				# The pack grew since it was mapped
+				if self.map is not None:
+					self.map.close()
+				with open(self.pack_path,'rb') as pack:
+					self.map = mmap.mmap(pack.fileno(),0,access=mmap.ACCESS_READ)
+			data = zlib.decompress(self.map[offset:offset + size])
+
+		return data.decode('utf-8') if is_text else data
+
+	def history(self,carrier,tracking_no):
+		'''
+			Returns [(time fetched, hash)] of the pages archived for tracking_no, oldest first
+		'''
+		return list(self.fetches.get((carrier,str(tracking_no)),[]))
+
+	def latest(self,carrier,tracking_no):
+		'''
+			Returns the page fetched last for tracking_no, or None if it was never archived
+		'''
+		history = self.fetches.get((carrier,str(tracking_no)))
+		return self.read(history[-1][1]) if history else None
+
+	def tracking_nos(self,carrier):
+		'''
+			Returns the tracking numbers of the carrier that have pages archived
+		'''
+		return [tracking_no for archived_carrier, tracking_no in self.fetches if archived_carrier == carrier]
+
+	def replay(self,tracker_class,tracking_nos=None,parser_backend=None):
+		'''
+			Runs Extract_Checkpoints of tracker_class on the latest archived page of each
+			tracking number (all of the carrier's by default), yielding the trackers.
+			A page that could not be parsed leaves its exception in tracker.error
+		'''
+		if tracking_nos is None:
+			tracking_nos = self.tracking_nos(tracker_class.carrier)
+
+		for tracking_no in tracking_nos:
+			tracker = tracker_class(tracking_no)
+			if parser_backend is not None:
+				tracker.parser_backend = parser_backend
+
+			tracker.page = self.latest(tracker.carrier,tracker.tracking_no)
+			if tracker.page is None:
+				tracker.error = KeyError('No page archived for {}'.format(tracker.tracking_no))
+			else:
+				try:
+					tracker.extract_checkpoints()
+				except Exception as e:
+					tracker.error = e
+			yield tracker
+
+	def close(self):
+		with self.lock:
+			self.index.close()
+			self.pack.close()
+			if self.map is not None:
+				self.map.close()
+				self.map = None
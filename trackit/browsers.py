@@ -0,0 +1,209 @@
+from contextlib import contextmanager
+from .lazy import LazyModule
+from threading import Condition
+from time import sleep, time
+import atexit
+
+webdriver = LazyModule('selenium.webdriver')
+exceptions = LazyModule('selenium.common.exceptions')
+
+# Is any of the markers (arguments[0]) in the page? Checked inside the browser so that
+# the page source doesn't have to be sent over to us every time
+MARKERS_PRESENT = '''
+	var html = document.documentElement.innerHTML;
+	for (var i = 0; i < arguments[0].length; i++) {
+		if (html.indexOf(arguments[0][i]) >= 0) return true;
+	}
+	return false;
+'''
+
+# Same as above, but waits for the page to change instead of being asked again and again.
+# Gives back null right away if the browser can't observe changes to the page
+MARKERS_APPEAR = '''
+	var markers = arguments[0], done = arguments[arguments.length - 1], pending = false;
+	function present() {
+		var html = document.documentElement.innerHTML;
+		for (var i = 0; i < markers.length; i++) {
+			if (html.indexOf(markers[i]) >= 0) return true;
+		}
+		return false;
+	}
+	if (present()) return done(true);
+	if (typeof MutationObserver === 'undefined') return done(null);
+	var observer = new MutationObserver(function () {
+		if (pending) return;
+		pending = true;		// look once per burst of changes
+		setTimeout(function () {
+			pending = false;
+			if (present()) { observer.disconnect(); done(true); }
+		}, 0);
+	});
+	observer.observe(document, {childList: true, subtree: true, characterData: true});
+'''
+
+class PollingWait(object):
+	'''
+		Waits for a page to be ready by checking for its markers every poll_interval seconds,
+		for timeout seconds at most
+	'''
+
+	def __init__(self,timeout=10,poll_interval=0.1):
+		self.timeout = timeout
+		self.poll_interval = poll_interval
+
+	def wait_for_markers(self,driver,markers,timeout=None):
+		'''
+			Returns once any of the markers is in the page, raises if timeout runs out first
+		'''
+		deadline = time() + (self.timeout if timeout is None else timeout)
+
+		while not driver.execute_script(MARKERS_PRESENT,list(markers)):
+			remaining = deadline - time()
+			if remaining <= 0:
+				raise Exception('Request timed out!')		# if the wait time is exceeded!
+			sleep(min(self.poll_interval,remaining))
+
+class MutationWait(PollingWait):
+	'''
+		Waits for a page to be ready by having the browser report back when the page changes
+		to contain one of the markers. Browsers without MutationObserver (such as PhantomJS
+		before 2.0) are polled instead
+	'''
+
+	def wait_for_markers(self,driver,markers,timeout=None):
+		timeout = self.timeout if timeout is None else timeout
+		deadline = time() + timeout
+
+		try:
+			driver.set_script_timeout(timeout)
+			if driver.execute_async_script(MARKERS_APPEAR,list(markers)):
+				return
+		except exceptions.TimeoutException:
+			raise Exception('Request timed out!')
+		except exceptions.WebDriverException:
+			pass		# the page navigated away under the script, fall back to polling
+
+		PollingWait.wait_for_markers(self,driver,markers,max(deadline - time(),0))
+
+class DriverPool(object):
+	'''
+		Keeps up to max_size headless browsers alive and leases them out to the trackers
+		that scrape with selenium, so that a lookup pays only for the navigation.
+		A browser is quit and replaced after max_uses pages, when it fails its health
+		check, or when a lookup using it raises.
+	'''
+
+	def __init__(self,factory=None,max_size=4,max_uses=50):
+		self.factory = factory			# callable that starts a browser, PhantomJS if None
+		self.max_size = max_size
+		self.max_uses = max_uses
+		self.idle = []					# browsers waiting to be leased
+		self.uses = {}					# browser -> pages loaded in it
+		self.size = 0					# browsers alive, leased or idle
+		self.condition = Condition()
+
+	def new_driver(self):
+		factory = self.factory or webdriver.PhantomJS
+		return factory()
+
+	def is_healthy(self,driver):
+		'''
+			A browser whose process died or hung can't tell its current url
+		'''
+		try:
+			driver.current_url
+			return True
+		except Exception:
+			return False
+
+	def quit(self,driver):
+		try:
+			driver.quit()
+		except Exception:
+			pass		# it is being thrown away anyway
+
+	def acquire(self,timeout=None):
+		'''
+			Leases a browser, waiting up to timeout seconds for one to be free
+		'''
+		deadline = None if timeout is None else time() + timeout
+
+		with self.condition:
+			while not self.idle and self.size >= self.max_size:
+				remaining = None if deadline is None else deadline - time()
+				if remaining is not None and remaining <= 0:
+					raise Exception('No browser became free in time!')
+				self.condition.wait(remaining)
+			if self.idle:
+				driver = self.idle.pop()
+			else:
+				driver = None
+				self.size += 1		# reserve the place of the browser about to be started
+
+		if driver is not None and not self.is_healthy(driver):
+			self.uses.pop(driver,None)
+			self.quit(driver)
+			driver = None
+
+		if driver is None:
+			try:
+				driver = self.new_driver()
+			except Exception:
+				with self.condition:
+					self.size -= 1
+					self.condition.notify()
+				raise
+			self.uses[driver] = 0
+
+		return driver
+
+	def release(self,driver,broken=False):
+		'''
+			Returns a leased browser, quitting it if it is broken or has loaded max_uses pages
+		'''
+		uses = self.uses.get(driver,0) + 1
+
+		with self.condition:
+			if broken or uses >= self.max_uses:
+				self.uses.pop(driver,None)
+				self.size -= 1
+			else:
+				self.uses[driver] = uses
+				self.idle.append(driver)
+				driver = None
+			self.condition.notify()
+
+		if driver is not None:
+			self.quit(driver)
+
+	@contextmanager
+	def lease(self,timeout=None):
+		'''
+			with pool.lease() as driver: ... -- the browser goes back to the pool afterwards.
+			A browser left by an exception of any kind, interrupts included, is quit
+		'''
+		driver = self.acquire(timeout)
+		broken = True
+		try:
+			yield driver
+			broken = False
+		finally:
+			self.release(driver,broken)
+
+	def close(self):
+		'''
+			Quits the idle browsers, leased ones are quit when they are returned
+		'''
+		with self.condition:
+			drivers = self.idle
+			self.idle = []
+			self.size -= len(drivers)
+			self.max_uses = 0		# so that browsers still leased are quit on release
+
+		for driver in drivers:
+			self.uses.pop(driver,None)
+			self.quit(driver)
+
+# The pool shared by all the selenium trackers
+pool = DriverPool()
+atexit.register(pool.close)
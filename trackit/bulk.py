@@ -0,0 +1,91 @@
+'''
+	Tracking many shipments at once, getting each back as soon as it has been tracked.
+
+		>>> from trackit.bulk import track_many
+		>>> for tracker in track_many(numbers, workers=32, timeout=10):
+		...     print(tracker.tracking_no, tracker.status, tracker.error)
+
+	The shipments can be given as trackers, as tracking numbers, whose carrier is told from
+	the number (see trackit.registry), or as (tracking number, carrier) pairs.
+'''
+from threading import Thread
+from time import time
+
+try:
+	from queue import Queue, Empty
+except ImportError:
+	from Queue import Queue, Empty
+
+from . import registry
+
+def track_one(shipment):
+	'''
+		Tracks a shipment given to track_many, returning its tracker. A shipment that could not
+		be tracked has its exception stored in tracker.error
+	'''
+	if hasattr(shipment,'Get_Tracking_Data'):
+		tracker = shipment
+		try:
+			tracker.Get_Tracking_Data()
+		except Exception as e:
+			tracker.error = e
+		return tracker
+
+	if isinstance(shipment,(tuple,list)):
+		tracking_no, carrier = shipment
+	else:
+		tracking_no, carrier = shipment, None
+
+	try:
+		return registry.carriers.attempt(tracking_no,carrier)
+	except Exception as e:
+		# No tracker could be made for the number, give back one that says why
+		from .trackers import Tracker
+
+		tracker = Tracker(tracking_no)
+		tracker.carrier = carrier
+		tracker.error = e
+		return tracker
+
+def track_many(shipments,workers=16,timeout=None):
+	'''
+		Tracks the shipments with up to workers at a time and yields each tracker as soon as
+		it is done, in the order they finish. shipments may be an endless iterator: a shipment
+		is only taken from it when a worker is free for it, and no more are tracked than the
+		results read. After timeout seconds, if given, no more shipments are started and the
+		ones not done yet are left out, so that only the results that came in time are yielded.
+		The lookups left out are not waited for, not even when the process exits
+	'''
+	deadline = None if timeout is None else time() + timeout
+	shipments = iter(shipments)
+	finished = Queue()
+	running = 0
+	exhausted = False
+
+	def work(shipment):
+		finished.put(track_one(shipment))
+
+	while True:
+		while not exhausted and running < workers and (deadline is None or time() < deadline):
+			try:
+				shipment = next(shipments)
+			except StopIteration:
+				exhausted = True
+				break
+			thread = Thread(target=work,args=(shipment,))
+			thread.daemon = True		# a lookup hung past the deadline mustn't keep the process alive
+			thread.start()
+			running += 1
+
+		if not running:
+			return
+
+		remaining = None if deadline is None else deadline - time()
+		if remaining is not None and remaining <= 0:
+			return
+		try:
+			tracker = finished.get(timeout=remaining)
+		except Empty:
+			return
+		running -= 1
+		yield tracker
@@ -0,0 +1,102 @@
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from .checkpoint import Checkpoint
+import sys
+
+class ResultCache(object):
+	'''
+		Keeps the status and tracking_data of tracked shipments, keyed by (carrier, tracking_no).
+		How long a result stays depends on its status, see ttls: delivered ('C') and returned
+		('R') shipments won't change any more and are kept until evicted, shipments in transit
+		('T') only briefly. The least recently used results are evicted once the cached data
+		takes more than max_bytes.
+	'''
+
+	def __init__(self,max_bytes=64 * 1024 * 1024,ttls=None):
+		self.max_bytes = max_bytes
+		self.ttls = {'C': None, 'R': None, 'T': 300}		# seconds a result is fresh for, None for ever
+		if ttls is not None:
+			self.ttls.update(ttls)
+
+		self.entries = OrderedDict()		# key -> (expiry time, status, tracking_data, size), oldest use first
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.lock = Lock()
+
+	def entry_size(self,tracking_data):
+		'''
+			A rough count of the bytes held by tracking_data, kept as tuples.
+			The strings are shared between checkpoints and counted once per entry
+		'''
+		size = sys.getsizeof(tracking_data)
+		strings = set()
+		for checkpoint in tracking_data:
+			size += sys.getsizeof(checkpoint) + sys.getsizeof(checkpoint[1])
+			strings.update((checkpoint[0],checkpoint[2]))
+		for text in strings:
+			size += sys.getsizeof(text)
+		return size
+
+	def get(self,carrier,tracking_no):
+		'''
+			Returns (status, tracking_data) of a fresh result, or None
+		'''
+		key = (carrier,tracking_no)
+
+		with self.lock:
+			entry = self.entries.get(key)
+			if entry is not None and entry[0] is not None and entry[0] <= time():
+				self.remove(key)
+				entry = None
+
+			if entry is None:
+				self.misses += 1
+				return None
+
+			self.hits += 1
+			self.entries.pop(key)
+			self.entries[key] = entry		# now the most recently used
+
+		return entry[1], [Checkpoint(*checkpoint) for checkpoint in entry[2]]
+
+	def put(self,carrier,tracking_no,status,tracking_data):
+		'''
+			Stores a result, unless its status isn't one to be cached
+		'''
+		if status not in self.ttls:
+			return
+
+		ttl = self.ttls[status]
+		expiry = None if ttl is None else time() + ttl
+		tracking_data = tuple((checkpoint['status'],checkpoint['date'],checkpoint['location']) for checkpoint in tracking_data)
+		size = self.entry_size(tracking_data)
+		key = (carrier,tracking_no)
+
+		with self.lock:
+			if key in self.entries:
+				self.remove(key)
+			self.entries[key] = (expiry,status,tracking_data,size)
+			self.size += size
+
+			while self.size > self.max_bytes and len(self.entries) > 1:
+				self.remove(next(iter(self.entries)))
+				self.evictions += 1
+
+	def remove(self,key):
+		self.size -= self.entries.pop(key)[3]
+
+	def clear(self):
+		with self.lock:
+			self.entries.clear()
+			self.size = 0
+
+	def stats(self):
+		'''
+			Returns the hit/miss counters and how full the cache is
+		'''
+		with self.lock:
+			return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+					'entries': len(self.entries), 'bytes': self.size}
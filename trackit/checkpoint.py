@@ -0,0 +1,79 @@
+try:
+	from collections.abc import Mapping
+except ImportError:
+	from collections import Mapping
+
+# Statuses and locations repeat across shipments, keep a single copy of each
+strings = {}
+max_strings = 100000		# past this many, new strings are no longer shared
+
+def shared(text):
+	'''
+		Returns the shared copy of text. Slicing also turns BeautifulSoup's NavigableStrings,
+		which keep the whole parsed page alive, into plain strings
+	'''
+	if text is None:
+		return None
+	copy = strings.get(text)
+	if copy is None:
+		copy = text[:]
+		if len(strings) < max_strings:
+			strings[copy] = copy
+	return copy
+
+class Checkpoint(Mapping):
+	'''
+		One checkpoint of a shipment, with the attributes status, date and location.
+		It takes a fraction of the memory of a dict, yet reads like the dicts trackers used
+		to return: checkpoint['status'], checkpoint.get('location'), dict(checkpoint).
+		It isn't a dict though: json can't serialise it and it takes no keys of its own.
+		Code that did either with the old dicts should use as_dict() (or copy()) first
+	'''
+	__slots__ = ('status','date','location')
+
+	fields = ('status','date','location')
+
+	def __init__(self,status,date,location):
+		self.status = shared(status)
+		self.date = date
+		self.location = shared(location)
+
+	def __getitem__(self,key):
+		if key not in self.fields:
+			raise KeyError(key)
+		return getattr(self,key)
+
+	def __setitem__(self,key,value):
+		if key not in self.fields:
+			raise KeyError(key)
+		setattr(self,key,value)
+
+	def __iter__(self):
+		return iter(self.fields)
+
+	def __len__(self):
+		return len(self.fields)
+
+	def __eq__(self,other):
+		if isinstance(other,Checkpoint):
+			return self.as_tuple() == other.as_tuple()
+		return Mapping.__eq__(self,other)
+
+	def __ne__(self,other):
+		return not self == other
+
+	__hash__ = None		# checkpoints can be changed like dicts, so they can't be hashed either
+
+	def __reduce__(self):
+		return Checkpoint, self.as_tuple()
+
+	def __repr__(self):
+		return 'Checkpoint(status={!r}, date={!r}, location={!r})'.format(*self.as_tuple())
+
+	def as_tuple(self):
+		return self.status, self.date, self.location
+
+	def as_dict(self):
+		return {'status': self.status, 'date': self.date, 'location': self.location}
+
+	copy = as_dict		# like dict.copy, a dict that can be changed freely
@@ -0,0 +1,102 @@
+'''
+	The trackit command: tracks the shipments listed in a file, or on stdin, and writes one
+	JSON line per shipment as soon as it has been tracked.
+
+		trackit numbers.txt > results.jsonl
+		cat numbers.txt | trackit --workers 32 --carrier bluedart
+
+	Each input line is a tracking number, optionally followed by a comma and its carrier
+	(bluedart, aramex, dhl, skynet, overnite, ecomm, gati). Without a carrier, on the line
+	or in --carrier, the carrier is told from the number, see trackit.registry.
+	Each output line has tracking_no, carrier, status, checkpoints, timings and error,
+	which is null unless the shipment could not be tracked.
+'''
+import argparse
+import json
+import sys
+
+from . import parsers
+from .bulk import track_many
+
+def read_shipments(lines,carrier=None):
+	'''
+		Yields (tracking_no, carrier) of each line that isn't blank or a # comment
+	'''
+	for line in lines:
+		line = line.strip()
+		if not line or line.startswith('#'):
+			continue
+		tracking_no, _, line_carrier = line.partition(',')
+		yield tracking_no.strip(), line_carrier.strip().lower() or carrier
+
+def result_of(tracker):
+	'''
+		The output line of a tracker, as a dict
+	'''
+	result = {'tracking_no': tracker.tracking_no, 'carrier': tracker.carrier, 'status': None,
+			  'checkpoints': [], 'timings': tracker.timings, 'error': None}
+	if tracker.error is None:
+		result['status'] = tracker.status
+		result['checkpoints'] = [checkpoint.as_dict() for checkpoint in tracker.tracking_data]
+	else:
+		result['error'] = '{}: {}'.format(type(tracker.error).__name__,tracker.error)
+	return result
+
+def as_json(result):
+	return json.dumps(result,sort_keys=True,default=lambda date: date.isoformat())
+
+def run(shipments,output,workers=16,timeout=None):
+	'''
+		Tracks the shipments with up to workers at a time, see trackit.bulk.track_many, writing
+		each result to output as soon as it is there. Returns how many shipments could not be
+		tracked, or None if the timeout ran out first
+	'''
+	counts = {'read': 0, 'tracked': 0, 'failed': 0, 'all read': False}
+
+	def counted():
+		for shipment in shipments:
+			counts['read'] += 1
+			yield shipment
+		counts['all read'] = True
+
+	for tracker in track_many(counted(),workers,timeout):
+		counts['tracked'] += 1
+		counts['failed'] += tracker.error is not None
+		output.write(as_json(result_of(tracker)) + '\n')
+		output.flush()
+
+	if not counts['all read'] or counts['tracked'] < counts['read']:
+		return None
+	return counts['failed']
+
+def main(argv=None):
+	argparser = argparse.ArgumentParser(prog='trackit',description='Track shipments in bulk, writing one JSON line per shipment')
+	argparser.add_argument('input',nargs='?',default='-',help='file of tracking_no[,carrier] lines (default: stdin)')
+	argparser.add_argument('--carrier',help='carrier of the numbers that have none on their line')
+	argparser.add_argument('--workers',type=int,default=16,help='shipments tracked at a time')
+	argparser.add_argument('--backend',choices=parsers.backends,help='parser backend to extract the checkpoints with')
+	argparser.add_argument('--output',default='-',help='file to write the results to (default: stdout)')
+	argparser.add_argument('--timeout',type=float,help='seconds to give all the shipments, after which those not tracked yet are left out')
+	args = argparser.parse_args(argv)
+
+	if args.backend is not None:
+		from .trackers import Tracker
+		Tracker.parser_backend = args.backend
+
+	source = sys.stdin if args.input == '-' else open(args.input)
+	output = sys.stdout if args.output == '-' else open(args.output,'w')
+	try:
+		failed = run(read_shipments(source,args.carrier),output,max(args.workers,1),args.timeout)
+	finally:
+		if source is not sys.stdin:
+			source.close()
+		if output is not sys.stdout:
+			output.close()
+
+	if failed is None:
+		sys.stderr.write('trackit: timed out, some shipments were not tracked\n')
+		return 2
+	return 1 if failed else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
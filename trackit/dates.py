@@ -0,0 +1,99 @@
+from datetime import datetime
+from .lazy import LazyModule
+import re
+
+dateutil_parser = LazyModule('dateutil.parser')
+
+MONTHS = ['january','february','march','april','may','june','july',
+		  'august','september','october','november','december']
+MONTH_NUMBERS = dict((name[:3], number) for number, name in enumerate(MONTHS,1))
+MONTH_NUMBERS.update((name, number) for number, name in enumerate(MONTHS,1))
+
+# What each strptime directive becomes in the fast path's regex
+DIRECTIVES = {
+	'd': r'(?P<day>\d{1,2})',
+	'm': r'(?P<month>\d{1,2})',
+	'b': r'(?P<month_name>[A-Za-z]{3})',
+	'B': r'(?P<month_name>[A-Za-z]+)',
+	'Y': r'(?P<year>\d{4})',
+	'H': r'(?P<hour>\d{1,2})',
+	'M': r'(?P<minute>\d{1,2})',
+	'S': r'(?P<second>\d{1,2})',
+	'A': r'[A-Za-z]+',			# the weekday, which strptime doesn't use either
+	'a': r'[A-Za-z]{3}',
+}
+
+def compile_format(date_format):
+	'''
+		Turns a strptime format into a regex matching the same dates
+	'''
+	pattern = ''
+	for index, part in enumerate(date_format.split('%')):
+		if index > 0:
+			if part[:1] not in DIRECTIVES:
+				raise ValueError('Unsupported directive in {}: %{}'.format(date_format,part[:1]))
+			pattern += DIRECTIVES[part[0]]
+			part = part[1:]
+		pattern += r'\s+'.join(re.escape(word) for word in part.split(' '))
+	return re.compile(pattern + '$')
+
+class DateParser(object):
+	'''
+		Parses the dates of a carrier, which come in a few fixed formats.
+		Each text is matched against the formats with precompiled regexes, which is a lot
+		faster than strptime or dateutil, and the dates parsed are remembered, up to
+		cache_size of them. Text that none of the formats matches goes to the fallback:
+			'strptime' parses it with the formats through strptime, which raises if it can't
+			'dateutil' lets dateutil make sense of it
+			None raises ValueError
+	'''
+
+	def __init__(self,formats,fallback='strptime',cache_size=4096):
+		self.formats = list(formats)
+		self.patterns = [compile_format(date_format) for date_format in self.formats]
+		self.fallback = fallback
+		self.cache_size = cache_size
+		self.cache = {}
+
+	def __call__(self,text):
+		date = self.cache.get(text)
+		if date is None:
+			date = self.fast_parse(text) or self.slow_parse(text)
+			if len(self.cache) >= self.cache_size:
+				self.cache.clear()
+			self.cache[text] = date
+		return date
+
+	def fast_parse(self,text):
+		for pattern in self.patterns:
+			match = pattern.match(text)
+			if match is None:
+				continue
+
+			fields = match.groupdict()
+			month = fields.get('month')
+			if month is None and fields.get('month_name') is not None:
+				month = MONTH_NUMBERS.get(fields['month_name'].lower())
+				if month is None:
+					continue
+			try:
+				return datetime(int(fields.get('year') or 1900), int(month or 1), int(fields.get('day') or 1),
+								int(fields.get('hour') or 0), int(fields.get('minute') or 0), int(fields.get('second') or 0))
+			except ValueError:
+				continue		# such as the 31st of a month with 30 days, let the fallback report it
+		return None
+
+	def slow_parse(self,text):
+		if self.fallback == 'dateutil':
+			return dateutil_parser.parse(text)
+
+		if self.fallback == 'strptime':
+			error = None
+			for date_format in self.formats:
+				try:
+					return datetime.strptime(text,date_format)
+				except ValueError as e:
+					error = e
+			raise error
+
+		raise ValueError('{!r} is in none of the formats {}'.format(text,self.formats))
@@ -0,0 +1,142 @@
+'''
+	Hooks run around the Get_Page and Extract_Checkpoints of a tracker, for profiling and
+	tracing lookups in production on a fraction of them.
+
+		>>> from trackit import hooks
+		>>> profiler = hooks.Profiler(sample_rate=0.01)
+		>>> Tracker.hooks = [profiler, hooks.Tracer(sample_rate=0.1, on_span=send_to_collector)]
+		...
+		>>> print(profiler.report())      # the slowest calls profiled, and where their time went
+
+	A hook decides for each call whether to sample it. Calls it samples are reported with
+	the tags of the call:
+		operation		'Get_Page' or 'Extract_Checkpoints'
+		carrier			the tracker's carrier
+		tracking_no		the shipment's tracking number
+		page_bytes		the size of the page, None if there's none
+		outcome			'ok', or the name of the exception raised
+'''
+from random import random
+from threading import Lock
+from time import time
+from timeit import default_timer
+import cProfile
+import collections
+import heapq
+import pstats
+
+try:
+	from StringIO import StringIO
+except ImportError:
+	from io import StringIO
+
+def tags(tracker,operation,error):
+	return {
+		'operation': operation,
+		'carrier': tracker.carrier,
+		'tracking_no': tracker.tracking_no,
+		'page_bytes': None if tracker.page is None else len(tracker.page),
+		'outcome': 'ok' if error is None else type(error).__name__,
+	}
+
+class Hook(object):
+	'''
+		Base of the hooks. start is called before each call and returns what finish needs
+		of it, or None if the call isn't sampled; finish is called after each sampled call
+		with the exception it raised, if any
+	'''
+
+	def __init__(self,sample_rate=1.0):
+		self.sample_rate = sample_rate
+
+	def sampled(self):
+		return self.sample_rate >= 1 or random() < self.sample_rate
+
+	def start(self,tracker,operation):
+		return True if self.sampled() else None
+
+	def finish(self,tracker,operation,state,error):
+		pass
+
+class Tracer(Hook):
+	'''
+		Records a span for each sampled call: {'name', 'start', 'seconds', 'tags'}, start being
+		a time() timestamp. The last keep spans are kept in spans, and each is passed to
+		on_span as it ends, for sending it on to a tracing system
+	'''
+
+	def __init__(self,sample_rate=1.0,on_span=None,keep=1000):
+		Hook.__init__(self,sample_rate)
+		self.on_span = on_span
+		self.spans = collections.deque(maxlen=keep)
+
+	def start(self,tracker,operation):
+		if not self.sampled():
+			return None
+		return time(), default_timer()
+
+	def finish(self,tracker,operation,state,error):
+		started_at, start = state
+		span = {'name': '{}.{}'.format(type(tracker).__name__,operation), 'start': started_at,
+				'seconds': default_timer() - start, 'tags': tags(tracker,operation,error)}
+
+		self.spans.append(span)
+		if self.on_span is not None:
+			self.on_span(span)
+
+class Profiler(Hook):
+	'''
+		Runs cProfile over each sampled call and keeps the profiles of the keep slowest of them.
+		A call made while another profiler is running in the process isn't profiled
+	'''
+
+	def __init__(self,sample_rate=0.01,keep=20):
+		Hook.__init__(self,sample_rate)
+		self.keep = keep
+		self.profiles = []		# heap of (seconds, order, tags, cProfile.Profile), the fastest at the top
+		self.calls = 0
+		self.lock = Lock()
+
+	def start(self,tracker,operation):
+		if not self.sampled():
+			return None
+
+		profile = cProfile.Profile()
+		try:
+			profile.enable()
+		except ValueError:
+			return None			# another profiler is active, which cProfile can't run alongside
+		return profile, default_timer()
+
+	def finish(self,tracker,operation,state,error):
+		profile, start = state
+		profile.disable()
+		seconds = default_timer() - start
+
+		with self.lock:
+			self.calls += 1
+			record = (seconds,self.calls,tags(tracker,operation,error),profile)
+			if len(self.profiles) < self.keep:
+				heapq.heappush(self.profiles,record)
+			elif seconds > self.profiles[0][0]:
+				heapq.heapreplace(self.profiles,record)
+
+	def slowest(self):
+		'''
+			Returns [(seconds, tags, pstats.Stats)] of the calls kept, slowest first
+		'''
+		with self.lock:
+			profiles = sorted(self.profiles,key=lambda record: record[:2],reverse=True)
+		return [(seconds, call_tags, pstats.Stats(profile)) for seconds, _, call_tags, profile in profiles]
+
+	def report(self,limit=15,sort='cumulative'):
+		'''
+			Returns the profiles of the calls kept as text, slowest first, with the limit
+			functions that took the longest in each
+		'''
+		output = StringIO()
+		for seconds, call_tags, stats in self.slowest():
+			output.write('{:.4f}s {}\n'.format(seconds,' '.join('{}={}'.format(name,call_tags[name]) for name in sorted(call_tags))))
+			stats.stream = output
+			stats.sort_stats(sort).print_stats(limit)
+		return output.getvalue()
@@ -0,0 +1,32 @@
+'''
+	Modules imported on first use.
+
+	selenium, BeautifulSoup, requests, dateutil and lxml take a while to import, and a
+	process only needs those of the carriers it tracks: tracking Gati needs neither
+	selenium nor lxml. The modules of trackit import them as LazyModules instead, so that
+	each is only imported when something in it is first used.
+
+		>>> requests = LazyModule('requests')      # nothing imported yet
+		>>> requests.Session()                      # imports requests
+'''
+import importlib
+
+class LazyModule(object):
+	'''
+		Stands in for the module called name, importing it the first time one of its
+		attributes is looked up. A module that isn't installed raises ImportError then
+	'''
+
+	def __init__(self,name):
+		self.__name = name
+		self.__module = None
+
+	def __getattr__(self,attribute):
+		module = self.__module
+		if module is None:
+			module = self.__module = importlib.import_module(self.__name)
+		return getattr(module,attribute)
+
+	def __repr__(self):
+		state = 'imported' if self.__module is not None else 'not imported yet'
+		return '<lazy module {!r}, {}>'.format(self.__name,state)
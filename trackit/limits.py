@@ -0,0 +1,182 @@
+'''
+	Pacing of the requests made to each carrier's site.
+
+	Every carrier has a Limiter, which lets a request through once
+		- the carrier's circuit isn't open, that is its site hasn't been failing,
+		- fewer than max_concurrent of its requests are in flight, and
+		- its token bucket has a token, refilled at rate tokens a second.
+
+		>>> from trackit import limits
+		>>> limits.pool.configure('bluedart', rate=5, burst=10, max_concurrent=8)
+
+	While a carrier's circuit is open lookups fail right away with CircuitOpen, instead of
+	each one waiting on a site that is down. After reset_timeout seconds one request is let
+	through to see if the site is back.
+'''
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock
+from time import sleep, time
+
+class CircuitOpen(Exception):
+	'''
+		Raised instead of sending a request to a carrier whose site has been failing
+	'''
+
+class TokenBucket(object):
+	'''
+		Lets through rate requests a second on average, and up to burst at once
+	'''
+
+	def __init__(self,rate,burst=1):
+		self.rate = float(rate)
+		self.burst = burst
+		self.tokens = float(burst)
+		self.updated = time()
+		self.lock = Lock()
+
+	def reserve(self):
+		'''
+			Takes a token, possibly one that is yet to come. Returns the seconds till it is there
+		'''
+		with self.lock:
+			now = time()
+			self.tokens = min(self.tokens + (now - self.updated) * self.rate,self.burst)
+			self.updated = now
+			self.tokens -= 1
+			return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+	def acquire(self):
+		'''
+			Waits for a token
+		'''
+		wait = self.reserve()
+		if wait > 0:
+			sleep(wait)
+
+class CircuitBreaker(object):
+	'''
+		Opens once failure_threshold requests in a row have failed. While open, requests
+		are refused; reset_timeout seconds after opening, a single request is let through
+		as a probe, which closes the circuit if it succeeds and opens it again if not
+	'''
+
+	def __init__(self,failure_threshold=5,reset_timeout=30):
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+		self.failures = 0
+		self.opened_at = None
+		self.probing = False
+		self.lock = Lock()
+
+	@property
+	def state(self):
+		if self.opened_at is None:
+			return 'closed'
+		if self.probing or time() - self.opened_at >= self.reset_timeout:
+			return 'half-open'
+		return 'open'
+
+	def allow(self,carrier=None):
+		'''
+			Raises CircuitOpen if a request may not go through now
+		'''
+		with self.lock:
+			if self.opened_at is None:
+				return
+			if not self.probing and time() - self.opened_at >= self.reset_timeout:
+				self.probing = True		# this request is the probe
+				return
+		raise CircuitOpen('{} is failing, not sending requests to it for now'.format(carrier or 'The site'))
+
+	def success(self):
+		with self.lock:
+			self.failures = 0
+			self.opened_at = None
+			self.probing = False
+
+	def abandon(self):
+		'''
+			A request ended without telling whether the site works, let another probe through
+		'''
+		with self.lock:
+			self.probing = False
+
+	def failure(self):
+		with self.lock:
+			self.failures += 1
+			if self.probing or self.failures >= self.failure_threshold:
+				self.opened_at = time()
+			self.probing = False
+
+class Limiter(object):
+	'''
+		The rate limit (None for none), concurrency cap (None for none) and circuit breaker
+		of one carrier
+	'''
+
+	def __init__(self,carrier=None,rate=None,burst=1,max_concurrent=None,failure_threshold=5,reset_timeout=30):
+		self.carrier = carrier
+		self.bucket = TokenBucket(rate,burst) if rate else None
+		self.slots = BoundedSemaphore(max_concurrent) if max_concurrent else None
+		self.breaker = CircuitBreaker(failure_threshold,reset_timeout)
+
+	@contextmanager
+	def request(self):
+		'''
+			Waits till a request may be sent to the carrier and keeps a slot for it while in
+			the with block. An exception raised in the block counts as a failure of the site
+		'''
+		self.breaker.allow(self.carrier)
+		try:
+			if self.bucket is not None:
+				self.bucket.acquire()
+			if self.slots is not None:
+				self.slots.acquire()
+			try:
+				yield
+			finally:
+				if self.slots is not None:
+					self.slots.release()
+		except Exception:
+			self.breaker.failure()
+			raise
+		except BaseException:
+			self.breaker.abandon()		# interrupted, which says nothing about the site
+			raise
+		else:
+			self.breaker.success()
+
+class LimiterPool(object):
+	'''
+		Keeps the Limiter of each carrier. A carrier's settings come from configure, or from
+		the defaults the carrier's tracker passes in on first use
+	'''
+
+	def __init__(self):
+		self.settings = {}		# carrier -> settings given to configure
+		self.limiters = {}
+		self.lock = Lock()
+
+	def configure(self,carrier,**settings):
+		'''
+			Sets the Limiter settings of a carrier, replacing its limiter
+		'''
+		with self.lock:
+			self.settings[carrier] = settings
+			self.limiters.pop(carrier,None)
+
+	def get(self,carrier,**defaults):
+		'''
+			Returns the limiter of the carrier, creating it on first use
+		'''
+		limiter = self.limiters.get(carrier)
+		if limiter is None:
+			with self.lock:
+				limiter = self.limiters.get(carrier)
+				if limiter is None:
+					settings = dict(defaults,**self.settings.get(carrier,{}))
+					limiter = self.limiters[carrier] = Limiter(carrier,**settings)
+		return limiter
+
+# The limiters shared by all the trackers
+pool = LimiterPool()
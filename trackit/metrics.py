@@ -0,0 +1,132 @@
+'''
+	Where the time of each lookup goes, per carrier.
+
+	Every tracker times the phases of a lookup into its timings and into a Metrics:
+		fetch	getting the page, the browser's wait included
+		wait	waiting for a browser's page to be ready
+		parse	picking the raw fields out of the page (building the soup or tree included)
+		extract	Extract_Checkpoints as a whole, parse and sort included
+		sort	sorting the checkpoints by date
+	and counts the lookups, the bytes of the pages fetched and the checkpoints extracted.
+
+		>>> from trackit import metrics
+		>>> metrics.collector.snapshot()['phases']['bluedart']['fetch']['count']
+		>>> print(metrics.collector.prometheus())
+'''
+from bisect import bisect_left
+from threading import Lock
+
+PHASES = ('fetch','wait','parse','extract','sort')
+
+# Upper bounds, in seconds, of the histogram buckets
+BUCKETS = (0.0005,0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30)
+
+COUNTERS = {
+	'lookups': 'Shipments tracked',
+	'page_bytes': 'Bytes of the pages fetched',
+	'checkpoints': 'Checkpoints extracted',
+}
+
+class Histogram(object):
+	'''
+		Counts the values observed that fall in each bucket, and their sum
+	'''
+
+	def __init__(self,buckets=BUCKETS):
+		self.buckets = buckets
+		self.counts = [0] * (len(buckets) + 1)		# the last one for values above every bucket
+		self.sum = 0.0
+		self.count = 0
+
+	def observe(self,value):
+		self.counts[bisect_left(self.buckets,value)] += 1
+		self.sum += value
+		self.count += 1
+
+	def cumulative(self):
+		'''
+			Returns [(upper bound, values up to it)], ending with ('+Inf', all the values)
+		'''
+		total = 0
+		bounds = []
+		for bound, count in zip(list(self.buckets) + ['+Inf'],self.counts):
+			total += count
+			bounds.append((bound,total))
+		return bounds
+
+class Metrics(object):
+	'''
+		Phase histograms and counters of every carrier, safe to update from many threads
+	'''
+
+	def __init__(self,buckets=BUCKETS):
+		self.buckets = buckets
+		self.lock = Lock()
+		self.reset()
+
+	def reset(self):
+		with self.lock:
+			self.histograms = {}	# (carrier, phase) -> Histogram
+			self.counters = {}		# (carrier, name) -> total
+
+	def observe(self,carrier,phase,seconds):
+		key = (carrier,phase)
+		with self.lock:
+			histogram = self.histograms.get(key)
+			if histogram is None:
+				histogram = self.histograms[key] = Histogram(self.buckets)
+			histogram.observe(seconds)
+
+	def count(self,carrier,name,value=1):
+		key = (carrier,name)
+		with self.lock:
+			self.counters[key] = self.counters.get(key,0) + value
+
+	def snapshot(self):
+		'''
+			Returns {'phases': {carrier: {phase: {'count', 'sum', 'buckets'}}}, 'counters': {carrier: {name: total}}}
+		'''
+		phases = {}
+		counters = {}
+		with self.lock:
+			for (carrier, phase), histogram in self.histograms.items():
+				phases.setdefault(carrier,{})[phase] = {'count': histogram.count, 'sum': histogram.sum,
+														 'buckets': histogram.cumulative()}
+			for (carrier, name), total in self.counters.items():
+				counters.setdefault(carrier,{})[name] = total
+		return {'phases': phases, 'counters': counters}
+
+	def prometheus(self,prefix='trackit'):
+		'''
+			Returns the metrics in the Prometheus text exposition format
+		'''
+		lines = []
+		with self.lock:
+			histograms = sorted(self.histograms.items(),key=lambda item: (str(item[0][0]),item[0][1]))
+			counters = sorted(self.counters.items(),key=lambda item: (str(item[0][0]),item[0][1]))
+
+			if histograms:
+				name = prefix + '_phase_seconds'
+				lines.append('# HELP {} Seconds spent in each phase of a lookup'.format(name))
+				lines.append('# TYPE {} histogram'.format(name))
+				for (carrier, phase), histogram in histograms:
+					labels = 'carrier="{}",phase="{}"'.format(carrier,phase)
+					for bound, total in histogram.cumulative():
+						lines.append('{}_bucket{{{},le="{}"}} {}'.format(name,labels,bound,total))
+					lines.append('{}_sum{{{}}} {}'.format(name,labels,repr(histogram.sum)))
+					lines.append('{}_count{{{}}} {}'.format(name,labels,histogram.count))
+
+			for counter in sorted(COUNTERS):
+				name = '{}_{}_total'.format(prefix,counter)
+				totals = [(carrier,total) for (carrier, counted), total in counters if counted == counter]
+				if not totals:
+					continue
+				lines.append('# HELP {} {}'.format(name,COUNTERS[counter]))
+				lines.append('# TYPE {} counter'.format(name))
+				for carrier, total in totals:
+					lines.append('{}{{carrier="{}"}} {}'.format(name,carrier,total))
+
+		return '\n'.join(lines) + '\n'
+
+# The metrics every tracker records into, unless given another (or None) in Tracker.metrics
+collector = Metrics()
@@ -0,0 +1,101 @@
+'''
+	Helpers for the lxml parser backend.
+
+	Every tracker picks the raw fields out of its page with BeautifulSoup by default
+	(parser_backend = 'soup'). With parser_backend = 'lxml' it uses lxml's C parser and
+	compiled XPath selectors instead, which give the same tracking_data several times
+	faster. The helpers here reproduce the BeautifulSoup lookups the trackers rely on.
+'''
+from .lazy import LazyModule
+import re
+
+etree = LazyModule('lxml.etree')
+html = LazyModule('lxml.html')
+
+backends = ('soup','lxml')
+
+XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+compiled = {}
+
+def require_lxml():
+	try:
+		etree.XPath
+	except ImportError:
+		raise ImportError('lxml is needed for the lxml parser backend: pip install lxml')
+
+def installed(backend):
+	'''
+		Whether the parser backend can be used, that is its parser is installed
+	'''
+	if backend == 'lxml':
+		try:
+			require_lxml()
+		except ImportError:
+			return False
+	return True
+
+def xpath(expression):
+	'''
+		Returns the compiled XPath for expression, compiling it only the first time
+	'''
+	selector = compiled.get(expression)
+	if selector is None:
+		selector = compiled[expression] = etree.XPath(expression)
+	return selector
+
+def has_class(name):
+	'''
+		XPath test for an element with name among its classes, like {'class':name} in BeautifulSoup
+	'''
+	return "contains(concat(' ',normalize-space(@class),' '),' {} ')".format(name)
+
+def without_declaration(page):
+	'''
+		lxml refuses decoded text that still declares an encoding
+	'''
+	if not isinstance(page,bytes):
+		page = XML_DECLARATION.sub('',page,count=1)
+	return page
+
+def html_tree(page):
+	require_lxml()
+	return html.document_fromstring(without_declaration(page))
+
+def xml_tree(page):
+	require_lxml()
+	return etree.fromstring(without_declaration(page),etree.XMLParser(recover=True))
+
+def first(selector,element):
+	'''
+		The first element the selector finds, or None like BeautifulSoup's find
+	'''
+	found = selector(element)
+	return found[0] if found else None
+
+def string_of(element):
+	'''
+		Same as BeautifulSoup's tag.string: the text of an element that has exactly one
+		child, looking through a single child element; None otherwise
+	'''
+	children = []
+	if element.text:
+		children.append(element.text)
+	for child in element:
+		children.append(child)
+		if child.tail:
+			children.append(child.tail)
+
+	if len(children) != 1:
+		return None
+	if isinstance(children[0],etree._Element):
+		if not isinstance(children[0].tag,str):
+			return children[0].text		# a comment
+		return string_of(children[0])
+	return children[0]
+
+def text_of(element):
+	'''
+		Same as BeautifulSoup's tag.text: all the text inside the element
+	'''
+	return ''.join(xpath('.//text()')(element))
@@ -0,0 +1,115 @@
+'''
+	Bulk tracking with fetching and parsing done separately.
+
+	Pages are fetched by a pool of threads, which spend their time waiting on the network,
+	and parsed by a pool of processes, so that parsing isn't held to one core by the GIL.
+	The processes send back compact (status, checkpoint tuples) results.
+
+		>>> pipeline = Pipeline(fetch_workers=32, parse_workers=8)
+		>>> trackers = pipeline.run([BluedartTracker(no) for no in numbers])
+'''
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+from .checkpoint import Checkpoint
+
+def parse_context():
+	'''
+		The parsing processes start while the fetching threads are running, and a child forked
+		while another thread holds a lock can deadlock on it. They are started afresh instead,
+		by a fork server where there is one
+	'''
+	methods = multiprocessing.get_all_start_methods()
+	return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+def extract(job):
+	'''
+		Runs in a parsing process. Extracts the checkpoints of one page and returns
+		(status, checkpoints as tuples, error, timings)
+	'''
+	tracker_class, tracking_no, page, parser_backend = job
+
+	tracker = tracker_class(tracking_no)
+	tracker.page = page
+	tracker.parser_backend = parser_backend
+	tracker.metrics = None		# the parent process records the timings sent back
+	try:
+		tracker.extract_checkpoints()
+	except Exception as e:
+		return None, None, e, tracker.timings
+
+	return tracker.status, [(checkpoint['status'],checkpoint['date'],checkpoint['location']) for checkpoint in tracker.tracking_data], None, tracker.timings
+
+class Pipeline(object):
+	'''
+		Tracks many shipments with fetch_workers threads fetching pages and parse_workers
+		processes (one per core by default) extracting checkpoints. Pages are handed to
+		the processes chunksize at a time
+	'''
+
+	def __init__(self,fetch_workers=16,parse_workers=None,chunksize=8):
+		self.fetch_workers = fetch_workers
+		self.parse_workers = parse_workers
+		self.chunksize = chunksize
+
+	def fetch(self,tracker):
+		'''
+			Fetches the page of a tracker in a fetching thread. Returns whether it still needs parsing
+		'''
+		if tracker.from_cache():
+			return False
+		try:
+			tracker.fetch_page()
+		except Exception as e:
+			tracker.error = e
+			return False
+		return True
+
+	def run(self,trackers):
+		'''
+			Fetches and parses the pages of the trackers, returning them in the same order.
+			A shipment that could not be tracked has its exception stored in tracker.error
+		'''
+		trackers = list(trackers)
+
+		with ThreadPoolExecutor(self.fetch_workers) as fetchers:
+			fetched = fetchers.map(self.fetch,trackers)
+			# Parsing starts on the first pages while the rest are still being fetched
+			self.parse(tracker for tracker, needs_parsing in zip(trackers,fetched) if needs_parsing)
+
+		return trackers
+
+	def parse(self,trackers):
+		'''
+			Extracts the checkpoints of trackers whose page is already there, such as pages
+			fetched earlier, in the parsing processes. Returns the trackers
+		'''
+		parsed = []
+
+		def jobs():
+			for tracker in trackers:
+				parsed.append(tracker)
+				yield type(tracker), tracker.tracking_no, tracker.page, tracker.parser_backend
+
+		with ProcessPoolExecutor(self.parse_workers,mp_context=parse_context()) as parsers:
+			results = parsers.map(extract,jobs(),chunksize=self.chunksize)
+
+			# results first, as each result pulls its job (and so its tracker) in
+			for (status, checkpoints, error, timings), tracker in zip(results,parsed):
+				tracker.timings.update(timings)
+				if tracker.metrics is not None:
+					for phase, seconds in timings.items():
+						tracker.metrics.observe(tracker.carrier,phase,seconds)
+
+				if error is not None:
+					tracker.error = error
+					continue
+
+				tracker.status = status
+				tracker.tracking_data = [Checkpoint(*checkpoint) for checkpoint in checkpoints]
+				if tracker.metrics is not None:
+					tracker.metrics.count(tracker.carrier,'lookups')
+					tracker.metrics.count(tracker.carrier,'checkpoints',len(tracker.tracking_data))
+				if tracker.result_cache is not None:
+					tracker.result_cache.put(tracker.carrier,tracker.tracking_no,tracker.status,tracker.tracking_data)
+
+		return parsed
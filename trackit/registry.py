@@ -0,0 +1,243 @@
+'''
+	Tracking without knowing the carrier beforehand.
+
+		>>> from trackit.registry import track
+		>>> tracker = track('12345678901')
+		>>> tracker.carrier, tracker.status
+
+	Each tracker class says what its carrier's tracking numbers look like in number_patterns.
+	The patterns of all the carriers are compiled into one regex, which tells in a single
+	match every carrier a number could belong to. Those carriers are tried most likely
+	first: a carrier's number_prior, weighed by how often numbers tried with it turned out
+	to be its own.
+
+	Packages can add carriers through the 'trackit.carriers' entry point group:
+		entry_points={'trackit.carriers': ['mycarrier = mypackage.trackers:MyTracker']}
+	with the carrier's name on the left. A carrier's tracker is only imported when it is
+	asked for by name, or when a number has to be matched against every carrier.
+'''
+from threading import Lock
+import re
+
+ENTRY_POINT_GROUP = 'trackit.carriers'
+
+# The carriers that come with trackit, for when it is run without being installed
+BUILTIN = [('bluedart','trackit.trackers:BluedartTracker'),
+		   ('aramex','trackit.trackers:AramexTracker'),
+		   ('dhl','trackit.trackers:DHLTracker'),
+		   ('skynet','trackit.trackers:Skynet_Tracker'),
+		   ('overnite','trackit.trackers:Overnite_Tracker'),
+		   ('ecomm','trackit.trackers:Ecomm_Tracker'),
+		   ('gati','trackit.trackers:Gati_Tracker')]
+
+def entry_points(group):
+	'''
+		Returns [(name, load)] of the installed entry points in group, load importing the object
+	'''
+	try:
+		from importlib import metadata
+	except ImportError:
+		try:
+			import pkg_resources
+		except ImportError:
+			return []
+		return [(entry_point.name,entry_point.load) for entry_point in pkg_resources.iter_entry_points(group)]
+
+	found = metadata.entry_points()
+	if hasattr(found,'select'):
+		found = found.select(group=group)
+	else:
+		found = found.get(group,[])
+	return [(entry_point.name,entry_point.load) for entry_point in found]
+
+def load_object(path):
+	'''
+		Imports 'module:name' and returns the name
+	'''
+	import importlib
+
+	module, name = path.split(':')
+	return getattr(importlib.import_module(module),name)
+
+class Registry(object):
+	'''
+		The tracker classes to pick from, one per carrier
+	'''
+
+	def __init__(self):
+		self.trackers = []		# the tracker classes, in the order registered
+		self.pending = {}		# carrier -> function importing its tracker class, for those not imported yet
+		self.index = None		# the regex matching the numbers of every carrier, built when needed
+		self.tries = {}			# carrier -> numbers tracked with it
+		self.found = {}			# carrier -> those that turned out to be its own
+		self.loaded = False
+		self.lock = Lock()
+
+	def register(self,tracker_class):
+		'''
+			Adds a tracker class, replacing the one registered for the same carrier
+		'''
+		with self.lock:
+			self.trackers = [registered for registered in self.trackers if registered.carrier != tracker_class.carrier]
+			self.trackers.append(tracker_class)
+			self.pending.pop(tracker_class.carrier,None)
+			self.index = None
+		return tracker_class
+
+	def register_lazy(self,carrier,load):
+		'''
+			Adds the carrier's tracker class, to be imported by calling load when it is first needed.
+			A tracker class already registered for the carrier is kept
+		'''
+		with self.lock:
+			self.add_pending(carrier,load)
+
+	def add_pending(self,carrier,load):
+		if carrier not in self.carriers():
+			self.pending[carrier] = load
+
+	def load(self):
+		'''
+			Registers the carriers that come with trackit and those of the 'trackit.carriers'
+			entry points, once, before the first lookup, without importing their trackers.
+			Lookups in other threads wait till all of them are registered
+		'''
+		if self.loaded:
+			return
+
+		with self.lock:
+			if self.loaded:
+				return
+
+			# Installed carriers first, so that they take over the built in ones of the same name
+			for carrier, load in entry_points(ENTRY_POINT_GROUP):
+				self.add_pending(carrier,load)
+
+			for carrier, path in BUILTIN:
+				self.add_pending(carrier,lambda path=path: load_object(path))
+
+			self.loaded = True
+
+	def import_tracker(self,carrier):
+		load = self.pending.get(carrier)
+		if load is not None:
+			self.register(load())
+
+	def carriers(self):
+		'''
+			Returns the names of the carriers registered, imported or not
+		'''
+		return [tracker_class.carrier for tracker_class in self.trackers] + list(self.pending)
+
+	def tracker_class(self,carrier):
+		'''
+			Returns the tracker class of a carrier, importing only that one
+		'''
+		self.load()
+		self.import_tracker(carrier)
+		for tracker_class in self.trackers:
+			if tracker_class.carrier == carrier:
+				return tracker_class
+		raise KeyError('No tracker for the carrier {}'.format(carrier))
+
+	def build_index(self):
+		'''
+			Compiles the patterns into one regex with an optional lookahead per carrier,
+			so that the groups that took part in a match are the carriers of the number
+		'''
+		lookaheads = []
+		for position, tracker_class in enumerate(self.trackers):
+			if tracker_class.number_patterns:
+				patterns = '|'.join('(?:{})'.format(pattern) for pattern in tracker_class.number_patterns)
+				lookaheads.append('(?:(?=(?P<c{}>(?:{})\\Z)))?'.format(position,patterns))
+		return list(self.trackers), re.compile(''.join(lookaheads))
+
+	def likelihood(self,tracker_class):
+		tries = self.tries.get(tracker_class.carrier,0)
+		found = self.found.get(tracker_class.carrier,0)
+		return tracker_class.number_prior * (found + 1.0) / (tries + 2.0)
+
+	def candidates(self,tracking_no):
+		'''
+			Returns the tracker classes whose carrier's numbers look like tracking_no, most likely first
+		'''
+		self.load()
+		for carrier in list(self.pending):
+			self.import_tracker(carrier)		# every carrier's patterns are needed
+
+		index = self.index
+		if index is None:
+			with self.lock:
+				index = self.index = self.build_index()
+		tracker_classes, pattern = index
+
+		match = pattern.match(str(tracking_no).strip())
+		matched = [tracker_classes[int(group[1:])] for group, value in match.groupdict().items() if value is not None]
+
+		return sorted(matched,key=self.likelihood,reverse=True)
+
+	def record(self,carrier,found):
+		with self.lock:
+			self.tries[carrier] = self.tries.get(carrier,0) + 1
+			if found:
+				self.found[carrier] = self.found.get(carrier,0) + 1
+
+	def track(self,tracking_no,carrier=None):
+		'''
+			Tracks a shipment with the tracker of carrier, or else with the tracker of each
+			carrier the number could belong to in turn, till one of them knows the number.
+			Returns that tracker. Raises ValueError if none of the carriers knows the number,
+			or the first other exception raised if a carrier could not be asked
+		'''
+		tracker = self.attempt(tracking_no,carrier)
+		if tracker.error is not None:
+			raise tracker.error
+		return tracker
+
+	def attempt(self,tracking_no,carrier=None):
+		'''
+			Same as track, but a shipment that could not be tracked still gives back a tracker
+			that tried it, with the exception track would raise in its error. Only a number
+			no tracker could be made for raises
+		'''
+		if carrier is not None:
+			tracker = self.tracker_class(carrier)(str(tracking_no).strip())
+			try:
+				tracker.Get_Tracking_Data()
+			except Exception as e:
+				tracker.error = e
+			return tracker
+
+		candidates = self.candidates(tracking_no)
+		if not candidates:
+			raise ValueError('{} does not look like a tracking number of any carrier'.format(tracking_no))
+
+		failed = None
+		for tracker_class in candidates:
+			tracker = tracker_class(str(tracking_no).strip())
+			try:
+				tracker.Get_Tracking_Data()
+			except ValueError:
+				self.record(tracker.carrier,False)		# not this carrier's number
+				continue
+			except Exception as e:
+				tracker.error = e
+				failed = failed or tracker				# the carrier is down, the number may still be its
+				continue
+
+			self.record(tracker.carrier,True)
+			return tracker
+
+		if failed is not None:
+			return failed
+		tracker.error = ValueError('None of {} knows the tracking number {}'.format(', '.join(tracker_class.carrier for tracker_class in candidates),tracking_no))
+		return tracker
+
+# The carriers to pick from by default
+carriers = Registry()
+
+def track(tracking_no,carrier=None):
+	'''
+		Tracks a shipment without saying which carrier it is with, see Registry.track
+	'''
+	return carriers.track(tracking_no,carrier)
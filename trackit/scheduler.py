@@ -0,0 +1,135 @@
+'''
+	Polls open shipments again when they are likely to have moved, instead of on a fixed cron.
+
+		>>> scheduler = Scheduler()
+		>>> for number in numbers:
+		...     scheduler.add(BluedartTracker(number))
+		>>> while scheduler:
+		...     for tracker, new_checkpoints in scheduler.poll(budget=100):
+		...         ...
+		...     sleep(scheduler.wait_time())
+
+	A shipment that moved recently is polled again soon, one that has been sitting at the
+	same place for days only now and then. Delivered ('C') and returned ('R') shipments are
+	not polled again.
+'''
+from datetime import datetime
+from threading import Lock
+from time import time
+import heapq
+
+TERMINAL = ('C','R')
+
+class Scheduler(object):
+	'''
+		Keeps the trackers of open shipments in a queue ordered by when they are due.
+		A shipment is due again after a quarter of the time since its last checkpoint,
+		but no sooner than min_interval and no later than max_interval seconds, scaled by
+		the factor of its carrier. A failed poll is retried after retry_interval seconds.
+	'''
+
+	def __init__(self,min_interval=15 * 60,max_interval=12 * 60 * 60,retry_interval=30 * 60,carrier_factors=None):
+		self.min_interval = min_interval
+		self.max_interval = max_interval
+		self.retry_interval = retry_interval
+
+		# Lookups through a browser cost the most, poll those less often
+		self.carrier_factors = {'aramex': 2.0, 'dhl': 2.0}
+		if carrier_factors is not None:
+			self.carrier_factors.update(carrier_factors)
+
+		self.queue = []			# (due time, order added, tracker)
+		self.added = 0
+		self.retired = 0		# shipments that reached a terminal status
+		self.lock = Lock()
+
+	def __len__(self):
+		return len(self.queue)
+
+	def add(self,tracker,due=None):
+		'''
+			Queues a tracker, due right away unless due (a time() timestamp) says otherwise.
+			Trackers of shipments already delivered or returned are not queued
+		'''
+		if tracker.status in TERMINAL:
+			return False
+
+		with self.lock:
+			heapq.heappush(self.queue,(time() if due is None else due,self.added,tracker))
+			self.added += 1
+		return True
+
+	def next_interval(self,tracker,now=None):
+		'''
+			Returns the seconds till the tracker should be polled again
+		'''
+		if tracker.error is not None:
+			return self.retry_interval
+
+		interval = self.min_interval
+		if tracker.tracking_data:
+			last_moved = max(checkpoint['date'] for checkpoint in tracker.tracking_data)
+			now = datetime.fromtimestamp(time() if now is None else now)
+			age = (now - last_moved).total_seconds()
+			interval = min(max(age / 4,self.min_interval),self.max_interval)
+
+		return interval * self.carrier_factors.get(tracker.carrier,1.0)
+
+	def due(self,now=None):
+		'''
+			Returns how many trackers are due
+		'''
+		now = time() if now is None else now
+		with self.lock:
+			return sum(1 for entry in self.queue if entry[0] <= now)
+
+	def wait_time(self,now=None):
+		'''
+			Returns the seconds till the next tracker is due, 0 if one is due already
+		'''
+		now = time() if now is None else now
+		with self.lock:
+			if not self.queue:
+				return None
+			return max(self.queue[0][0] - now,0)
+
+	def take(self,budget=None,now=None):
+		'''
+			Takes out the trackers that are due, most overdue first, up to budget of them
+		'''
+		now = time() if now is None else now
+		taken = []
+		with self.lock:
+			while self.queue and self.queue[0][0] <= now and (budget is None or len(taken) < budget):
+				taken.append(heapq.heappop(self.queue)[2])
+		return taken
+
+	def reschedule(self,tracker,now=None):
+		'''
+			Queues a polled tracker again, or retires it if the shipment is done
+		'''
+		now = time() if now is None else now
+		if tracker.error is None and tracker.status in TERMINAL:
+			with self.lock:
+				self.retired += 1
+			return
+		self.add(tracker,now + self.next_interval(tracker,now))
+
+	def poll(self,budget=None,now=None):
+		'''
+			Refreshes the trackers that are due, up to budget of them, and queues them again.
+			Returns [(tracker, new checkpoints)]; a failed poll leaves its exception in tracker.error
+		'''
+		polled = []
+		for tracker in self.take(budget,now):
+			tracker.error = None
+			try:
+				new_checkpoints = tracker.Refresh()
+			except Exception as e:
+				tracker.error = e
+				new_checkpoints = []
+
+			self.reschedule(tracker,now)
+			polled.append((tracker,new_checkpoints))
+
+		return polled
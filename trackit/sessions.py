@@ -0,0 +1,279 @@
+from collections import deque
+from .lazy import LazyModule
+from random import uniform
+from threading import Lock, Thread
+from time import sleep, time
+import re
+
+try:
+	from queue import Queue, Empty
+except ImportError:
+	from Queue import Queue, Empty
+
+requests = LazyModule('requests')
+adapters = LazyModule('requests.adapters')
+
+RETRY_STATUSES = (502,503,504)		# answers that say the next attempt may well work
+
+class SessionPool(object):
+	'''
+		Keeps one requests.Session per carrier so that the TCP and TLS connections to a
+		carrier's site are reused across shipments instead of being set up every time.
+		Each session keeps up to pool_size connections alive.
+		How long the last latency_window requests to each carrier took is kept, for hedging.
+	'''
+
+	def __init__(self,pool_size=10,latency_window=200):
+		self.pool_size = pool_size
+		self.carrier_pool_sizes = {}		# carrier -> pool_size, for carriers configured separately
+		self.sessions = {}
+		self.latency_window = latency_window
+		self.latencies = {}					# carrier -> seconds taken by its recent requests
+		self.lock = Lock()
+
+	def configure(self,carrier=None,pool_size=None):
+		'''
+			Sets the pool size for a carrier, or for every carrier if none is given.
+			Sessions already handed out are replaced so that the new size takes effect
+		'''
+		with self.lock:
+			if carrier is None:
+				self.pool_size = pool_size
+				self.carrier_pool_sizes.clear()
+				stale = list(self.sessions.values())
+				self.sessions.clear()
+			else:
+				self.carrier_pool_sizes[carrier] = pool_size
+				stale = [self.sessions.pop(carrier)] if carrier in self.sessions else []
+
+		for session in stale:
+			session.close()
+
+	def new_session(self,carrier):
+		'''
+			Builds the session for a carrier, with its connection pool mounted
+		'''
+		pool_size = self.carrier_pool_sizes.get(carrier,self.pool_size)
+		session = requests.Session()
+		adapter = adapters.HTTPAdapter(pool_connections=pool_size,pool_maxsize=pool_size)
+		session.mount('http://',adapter)
+		session.mount('https://',adapter)
+		return session
+
+	def get(self,carrier):
+		'''
+			Returns the shared session of the carrier, creating it on first use
+		'''
+		session = self.sessions.get(carrier)
+		if session is None:
+			with self.lock:
+				session = self.sessions.get(carrier)
+				if session is None:
+					session = self.sessions[carrier] = self.new_session(carrier)
+		return session
+
+	def record_latency(self,carrier,seconds):
+		latencies = self.latencies.get(carrier)
+		if latencies is None:
+			latencies = self.latencies.setdefault(carrier,deque(maxlen=self.latency_window))
+		latencies.append(seconds)
+
+	def percentile(self,carrier,percent=95,min_samples=20):
+		'''
+			Returns the seconds within which percent of the carrier's recent requests were
+			answered, or None until min_samples of them have been
+		'''
+		latencies = sorted(self.latencies.get(carrier,()))
+		if len(latencies) < max(min_samples,1):
+			return None
+		return latencies[min(int(len(latencies) * percent / 100.0),len(latencies) - 1)]
+
+	def timed_request(self,carrier,method,url,**options):
+		start = time()
+		response = self.get(carrier).request(method,url,**options)
+		self.record_latency(carrier,time() - start)
+		return response
+
+	def hedged_request(self,carrier,method,url,**options):
+		'''
+			Sends the request and, if it isn't answered within the carrier's p95, the same
+			request again. Returns whichever response comes first; the slower one is dropped.
+			Without enough latencies recorded yet it is a plain request
+		'''
+		delay = self.percentile(carrier)
+		if delay is None:
+			return self.timed_request(carrier,method,url,**options)
+
+		results = Queue()
+
+		def attempt():
+			try:
+				results.put((self.timed_request(carrier,method,url,**options),None))
+			except Exception as e:
+				results.put((None,e))
+
+		def start():
+			thread = Thread(target=attempt)
+			thread.daemon = True
+			thread.start()
+
+		start()
+		try:
+			response, error = results.get(timeout=delay)
+			attempts = 1
+		except Empty:
+			start()		# the first attempt is slower than most, race it with a second one
+			response, error = results.get()
+			attempts = 2
+
+		if error is not None and attempts == 2:
+			response, error = results.get()		# the other attempt may still work out
+		if error is not None:
+			raise error
+		return response
+
+	def send(self,carrier,method,url,timeout=None,retries=0,backoff=0.5,hedge=False,**options):
+		'''
+			Makes a request over the carrier's session within timeout seconds for all its
+			attempts together. A request that fails to connect, times out or gets one of
+			RETRY_STATUSES is retried up to retries times, after a random wait of up to
+			backoff, 2 * backoff, 4 * backoff ... seconds. With hedge, each attempt is a
+			hedged_request
+		'''
+		deadline = None if timeout is None else time() + timeout
+		request = self.hedged_request if hedge else self.timed_request
+		attempt = 0
+
+		while True:
+			if deadline is not None:
+				options['timeout'] = max(deadline - time(),0.001)
+
+			try:
+				response = request(carrier,method,url,**options)
+				if response.status_code not in RETRY_STATUSES:
+					return response
+				error = None
+			except (requests.ConnectionError,requests.Timeout) as e:
+				error = e
+
+			wait = uniform(0,backoff * 2 ** attempt)
+			if attempt >= retries or (deadline is not None and time() + wait >= deadline):
+				if error is not None:
+					raise error
+				return response		# the caller decides what to make of the last answer
+
+			if error is None:
+				response.close()		# give its connection back before trying again
+			sleep(wait)
+			attempt += 1
+
+	def prewarm(self,carrier,url,connections=1,verify=True):
+		'''
+			Opens connections to the carrier's site ahead of the first lookup.
+			The requests are made in parallel so that each one holds its own connection,
+			which goes back to the pool once the response is read
+		'''
+		session = self.get(carrier)
+
+		def warm():
+			try:
+				session.head(url,verify=verify,timeout=10)
+			except requests.RequestException:
+				pass		# a failed warm up only means the first lookup pays for the handshake
+
+		threads = [Thread(target=warm) for _ in range(connections)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+	def close(self):
+		'''
+			Closes every session and the connections they hold
+		'''
+		with self.lock:
+			sessions = list(self.sessions.values())
+			self.sessions.clear()
+
+		for session in sessions:
+			session.close()
+
+# The hidden fields of an ASP.NET form that carry its state between requests
+INPUT_TAG = re.compile(r'<input\b[^>]*>',re.I)
+INPUT_NAME = re.compile(r'\bname\s*=\s*["\']([^"\']*)["\']',re.I)
+INPUT_VALUE = re.compile(r'\bvalue\s*=\s*["\']([^"\']*)["\']',re.I)
+
+# What an ASP.NET site answers when the form state or the session it was given are no good
+REJECTIONS = ('validation of viewstate mac failed','invalid postback or callback argument',
+			  'the state information is invalid','session has expired','session expired')
+
+def form_fields(page):
+	'''
+		Returns the hidden ASP.NET state fields (__VIEWSTATE, __EVENTVALIDATION ...) of the forms on page
+	'''
+	fields = {}
+	for tag in INPUT_TAG.findall(page):
+		name = INPUT_NAME.search(tag)
+		if name is not None and name.group(1).startswith('__'):
+			value = INPUT_VALUE.search(tag)
+			fields[name.group(1)] = value.group(1).replace('&amp;','&') if value is not None else ''
+	return fields
+
+class FormSession(object):
+	'''
+		The session cookies and form state of an ASP.NET page at url, fetched with one GET and
+		shared by every lookup posting to it until the site rejects them. Only then are they
+		fetched again, once, however many lookups were turned down
+	'''
+
+	def __init__(self,url,verify=True,headers=None):
+		self.url = url
+		self.verify = verify
+		self.headers = headers
+		self.current = None		# {'fields': form state, 'cookies': session cookies}
+		self.refreshes = 0		# times the state was fetched
+		self.lock = Lock()
+
+	def state(self,tracker):
+		'''
+			Returns the current {'fields', 'cookies'}, fetching them for tracker, over its carrier's
+			session and within its request_timeout, if there are none
+		'''
+		current = self.current
+		if current is None:
+			with self.lock:
+				current = self.current
+				if current is None:
+					current = self.current = self.fetch(tracker)
+		return current
+
+	def fetch(self,tracker):
+		response = tracker.session_pool.send(tracker.carrier,'GET',self.url,timeout=tracker.request_timeout,
+											 retries=tracker.max_retries,backoff=tracker.retry_backoff,
+											 headers=self.headers,verify=self.verify)
+		response.raise_for_status()
+		self.refreshes += 1
+
+		# The session cookie may have been sent before, and kept by the session
+		cookies = dict(tracker.session_pool.get(tracker.carrier).cookies.items())
+		cookies.update(response.cookies.items())
+		return {'fields': form_fields(response.text), 'cookies': cookies}
+
+	def rejected(self,page):
+		'''
+			Whether the answer to a post says the form state or session it was sent with are no good.
+			Other errors, a 500 of a site that is down included, are not taken for it
+		'''
+		page = (page or '')[:65536].lower()
+		return any(rejection in page for rejection in REJECTIONS)
+
+	def invalidate(self,state):
+		'''
+			Drops state, if it is still the current one, so that the next lookup fetches a fresh one
+		'''
+		with self.lock:
+			if self.current is state:
+				self.current = None
+
+# The pool shared by all the trackers
+pool = SessionPool()
@@ -1,9 +1,16 @@
-from bs4 import BeautifulSoup
-import requests
+from contextlib import contextmanager
 from datetime import datetime
-from selenium import webdriver
-from time import sleep
-from dateutil.parser import parse
+from timeit import default_timer
+import hashlib
+import re
+from . import browsers, dates, limits, metrics, parsers, sessions
+from .checkpoint import Checkpoint
+from .lazy import LazyModule
+from xml.etree import ElementTree
+
+# Imported when a page is first parsed with BeautifulSoup, or a date first left to dateutil
+bs4 = LazyModule('bs4')
+dateutil_parser = LazyModule('dateutil.parser')
 
 __author__ = 'K R Prajwal'
 
@@ -13,9 +20,51 @@ class Tracker(object):
 		Each has the following Attributes:
 			tracking_no: Tracking number of the shipment
 			page: Raw HTML data of the page
-			tracking_data: A list of checkpoints of the shipment
+			tracking_data: A list of checkpoints of the shipment, see trackit.checkpoint
 			status: The current/overall status of the shipment
+			error: The exception raised while tracking in a batch, if any
+			fingerprint: Hash of the part of the page the checkpoints were last extracted from
+			timings: Seconds spent in each phase of the last lookup, see trackit.metrics
+
+		Trackers that scrape over plain HTTP describe their request in Build_Request and
+		share the pooled keep-alive session of their carrier for fetching it.
+		Every request to a carrier's site goes through the carrier's limiter, see trackit.limits.
 	'''
+
+	carrier = None					# name the carrier's session, and anything else kept per carrier, goes by
+	home_url = None				# a cheap page on the carrier's site, used for warming up connections
+	page_as_text = True			# store the decoded text of the response, False for a tracker that needs the raw bytes
+	session_pool = sessions.pool
+	limiter_pool = limits.pool
+	rate_limits = {}				# settings of the carrier's limiter unless configured in limiter_pool
+	request_timeout = 30			# seconds a request may take, its retries included
+	max_retries = 2					# times a request that failed to connect or timed out is sent again
+	retry_backoff = 0.5				# seconds to wait before the first retry, at most; doubles for each one after
+	hedge_requests = False			# race a request slower than the carrier's p95 with a second one
+
+	# What the carrier's tracking numbers look like, for telling the carrier from the number, see trackit.registry
+	number_patterns = []			# regexes a whole tracking number of the carrier matches
+	number_prior = 1.0				# how likely a number matching them is the carrier's, relative to other carriers
+	parser_backend = 'soup'			# 'soup' (BeautifulSoup) or 'lxml' (faster), see trackit.parsers
+	result_cache = None				# a trackit.cache.ResultCache to reuse recent results from
+	page_archive = None				# a trackit.archive.PageArchive to keep every page fetched in
+	archive_replay = False			# take the pages from page_archive instead of the carrier's site
+	conditional_requests = False	# the site answers 304 Not Modified to If-None-Match/If-Modified-Since
+	metrics = metrics.collector		# where the phases of every lookup are timed, None for nowhere
+	hooks = []						# trackit.hooks run around Get_Page and Extract_Checkpoints
+	form_session = None				# a trackit.sessions.FormSession for sites that post ASP.NET forms
+	driver_pool = None				# a trackit.browsers.DriverPool for trackers that drive a browser
+
+	# Parts of a page that change from one fetch to the next while the shipment doesn't
+	fingerprint_ignore = [r'(?is)<head\b.*?</head>',
+						  r'(?is)<script\b.*?</script>',
+						  r'(?i)<input[^>]*__(?:VIEWSTATE|VIEWSTATEGENERATOR|EVENTVALIDATION)[^>]*>']
+
+	# Carriers whose sites accept several tracking numbers in one request override these
+	max_batch_size = 1				# how many tracking numbers fit in one request
+	batch_separator = ','			# how the tracking numbers are joined in that request
+	batch_section_start = r'(?<![\w,]){}(?![\w,])'	# regex marking where a shipment's part of the page begins
+
 	def __init__(self,tracking_no):
 		'''
 			Returns a Scraper Object containing the above Attributes
@@ -24,14 +73,383 @@ class Tracker(object):
 		self.page = None
 		self.tracking_data = []
 		self.status = None
+		self.error = None
+		self.fingerprint = None
+		self.validators = {}		# headers making the next request conditional
+		self.timings = {}
+		self.form_state = None		# the form_session state the last request was sent with
+		self.driver = None			# the browser leased for the lookup in progress
+		self.leased_at = None		# when the lease was asked for, which counts against request_timeout
 
 	def Get_Tracking_Data(self):
 		'''
 			Helper function to get the tracking_data
 		'''
 
-		self.Get_Page()
-		self.Extract_Checkpoints()
+		self.timings = {}
+		if self.from_cache():
+			return
+
+		self.fetch_page()
+		self.extract_changed()
+
+		# Cached either way, the entry the lookup missed may have expired
+		self.cache_result()
+
+	def extract_changed(self):
+		'''
+			Extracts the checkpoints afresh, unless the page is the same as the one they came from
+		'''
+		fingerprint = self.page_fingerprint()
+		if fingerprint != self.fingerprint:
+			self.tracking_data = []		# start afresh, so that tracking again doesn't repeat the checkpoints
+			self.extract_checkpoints()
+			self.fingerprint = fingerprint
+
+	def cache_result(self):
+		if self.result_cache is not None:
+			self.result_cache.put(self.carrier,self.tracking_no,self.status,self.tracking_data)
+
+	def Refresh(self):
+		'''
+			Tracks the shipment again and returns only the checkpoints added since it was last tracked,
+			in order of date. tracking_data is updated to the full list as usual
+		'''
+		seen = set(self.checkpoint_key(checkpoint) for checkpoint in self.tracking_data)
+
+		self.Get_Tracking_Data()
+
+		new_checkpoints = []
+		for checkpoint in self.tracking_data:
+			key = self.checkpoint_key(checkpoint)
+			if key not in seen:		# a page may list the same checkpoint twice, report it once
+				seen.add(key)
+				new_checkpoints.append(checkpoint)
+
+		return new_checkpoints
+
+	def page_fingerprint(self):
+		'''
+			Hashes the page, leaving out the parts in fingerprint_ignore
+		'''
+		page = self.page
+		is_bytes = isinstance(page,bytes)
+		for pattern in self.fingerprint_ignore:
+			if is_bytes:
+				pattern = pattern.encode('ascii')
+			page = re.sub(pattern,b'' if is_bytes else '',page)
+
+		return hashlib.sha1(page if is_bytes else page.encode('utf-8')).hexdigest()
+
+	def checkpoint_key(self,checkpoint):
+		'''
+			What makes two checkpoints the same
+		'''
+		return checkpoint['date'], checkpoint['status'], checkpoint['location']
+
+	def from_cache(self):
+		'''
+			Fills in status and tracking_data from result_cache if it has them. Returns whether it did
+		'''
+		if self.result_cache is None:
+			return False
+
+		cached = self.result_cache.get(self.carrier,self.tracking_no)
+		if cached is None:
+			return False
+
+		self.status, self.tracking_data = cached
+		return True
+
+	def fetch_page(self):
+		'''
+			Get_Page, keeping the page in page_archive if there is one.
+			In replay mode the page archived last is used instead of fetching it
+		'''
+		if self.page_archive is not None and self.archive_replay:
+			self.page = self.page_archive.latest(self.carrier,self.tracking_no)
+			if self.page is None:
+				raise KeyError('No page archived for {}'.format(self.tracking_no))
+			return
+
+		with self.timed('fetch'):
+			self.paced_get_page()
+		self.count_page()
+		self.archive_page()
+
+	def paced_get_page(self):
+		'''
+			Get_Page once the carrier's limiter lets it through, with the tracker's browser,
+			if it drives one, leased beforehand
+		'''
+		with self.leased():
+			with self.limiter.request(), self.hooked('Get_Page'):
+				self.Get_Page()
+
+	@contextmanager
+	def leased(self):
+		'''
+			Leases a browser from driver_pool into self.driver for the with block, if the tracker
+			drives one. It is leased before the limiter is asked, so that waiting for a free
+			browser neither holds one of the carrier's slots nor counts as a failure of its site
+		'''
+		if self.driver_pool is None or self.driver is not None:
+			yield
+			return
+
+		self.leased_at = default_timer()
+		with self.driver_pool.lease(self.request_timeout) as driver:
+			self.driver = driver
+			try:
+				yield
+			finally:
+				self.driver = None
+
+	def extract_checkpoints(self):
+		'''
+			Extract_Checkpoints, timed and counted in metrics
+		'''
+		with self.timed('extract'), self.hooked('Extract_Checkpoints'):
+			self.Extract_Checkpoints()
+
+		if self.metrics is not None:
+			self.metrics.count(self.carrier,'lookups')
+			self.metrics.count(self.carrier,'checkpoints',len(self.tracking_data))
+
+	def sort_checkpoints(self):
+		'''
+			Sorts tracking_data by date
+		'''
+		with self.timed('sort'):
+			self.tracking_data = sorted(self.tracking_data, key=lambda k: k['date'])
+
+	@contextmanager
+	def timed(self,phase):
+		'''
+			Adds the time spent in the with block to timings[phase] and to the carrier's histogram of phase
+		'''
+		start = default_timer()
+		try:
+			yield
+		finally:
+			seconds = default_timer() - start
+			self.timings[phase] = self.timings.get(phase,0) + seconds
+			if self.metrics is not None:
+				self.metrics.observe(self.carrier,phase,seconds)
+
+	@contextmanager
+	def hooked(self,operation):
+		'''
+			Runs the hooks that sample this call of operation around the with block
+		'''
+		if not self.hooks:
+			yield
+			return
+
+		started = [(hook, hook.start(self,operation)) for hook in self.hooks]
+		error = None
+		try:
+			yield
+		except BaseException as e:
+			error = e
+			raise
+		finally:
+			for hook, state in reversed(started):
+				if state is not None:
+					hook.finish(self,operation,state,error)
+
+	def count_page(self):
+		if self.metrics is not None and self.page is not None:
+			self.metrics.count(self.carrier,'page_bytes',len(self.page))
+
+	def archive_page(self):
+		if self.page_archive is not None and self.page is not None:
+			self.page_archive.store(self.carrier,self.tracking_no,self.page)
+
+	def Get_Tracking_Data_Async(self,engine=None):
+		'''
+			Awaitable counterpart of Get_Tracking_Data, see trackit.aio
+		'''
+		from .aio import default_engine
+
+		return (engine or default_engine()).get_tracking_data(self)
+
+	def parse_page(self):
+		'''
+			Picks the raw fields out of self.page with the parser_backend of the tracker.
+			Trackers implement it once per backend, as parse_soup and parse_lxml
+		'''
+		if self.parser_backend not in parsers.backends:
+			raise ValueError('Unknown parser backend: {}'.format(self.parser_backend))
+
+		parse_with = getattr(self,'parse_' + self.parser_backend,None) or self.parse_soup
+		with self.timed('parse'):
+			return parse_with()
+
+	@property
+	def session(self):
+		'''
+			The pooled session of this tracker's carrier
+		'''
+		return self.session_pool.get(self.carrier)
+
+	def load_form_state(self):
+		'''
+			Returns the shared {'fields', 'cookies'} of form_session for building a request,
+			remembering them in case the site turns them down
+		'''
+		self.form_state = self.form_session.state(self)
+		return self.form_state
+
+	@property
+	def limiter(self):
+		'''
+			The rate limit, concurrency cap and circuit breaker of this tracker's carrier
+		'''
+		return self.limiter_pool.get(self.carrier,**self.rate_limits)
+
+	def Build_Request(self):
+		'''
+			Returns (method, url, options) of the request for the page of tracking_no,
+			options being the keyword arguments for requests
+		'''
+		raise NotImplementedError
+
+	def Get_Page(self):
+		'''
+			Fetches raw HTML data from the site for a given tracking_no
+		'''
+		for attempt in (1,2):
+			method, url, options = self.Build_Request()
+			options = self.conditional(options)
+
+			# request the server for the HTML data, over a kept alive connection if one is free
+			response = self.session_pool.send(self.carrier,method,url,timeout=self.request_timeout,retries=self.max_retries,
+											  backoff=self.retry_backoff,hedge=self.hedge_requests,**options)
+
+			if self.form_session is None or attempt == 2 or not self.form_session.rejected(response.text):
+				break
+			# The site turned down the form state or session, post again with fresh ones
+			self.form_session.invalidate(self.form_state)
+
+		if response.status_code == 304:
+			return		# Not Modified, self.page is still the page
+
+		if response.status_code == 429 or response.status_code >= 500:
+			response.raise_for_status()		# throttled or down, which the carrier's limiter counts
+
+		self.page = response.text if self.page_as_text else response.content
+		self.keep_validators(response.headers)
+
+	def conditional(self,options):
+		'''
+			Returns the request options, with the validators of the page we have added if the
+			site answers conditional requests
+		'''
+		if self.conditional_requests and self.validators and self.page is not None:
+			options = dict(options)
+			options['headers'] = dict(options.get('headers') or {}, **self.validators)
+		return options
+
+	def keep_validators(self,headers):
+		'''
+			Keeps the ETag and Last-Modified of the page fetched, for asking for it again conditionally
+		'''
+		if self.conditional_requests:
+			self.validators = {}
+			if 'ETag' in headers:
+				self.validators['If-None-Match'] = headers['ETag']
+			if 'Last-Modified' in headers:
+				self.validators['If-Modified-Since'] = headers['Last-Modified']
+
+	@classmethod
+	def Prewarm(cls,connections=1):
+		'''
+			Opens connections to the carrier's site before the first shipment is tracked
+		'''
+		cls.session_pool.prewarm(cls.carrier,cls.home_url,connections,verify=False)
+
+		if cls.form_session is not None:
+			try:
+				cls.form_session.state(cls)
+			except Exception:
+				pass		# the first lookup will fetch it
+
+	@classmethod
+	def Split_Batch_Page(cls,page,tracking_nos):
+		'''
+			Splits the page returned for a batch of tracking numbers into one page per shipment.
+			Returns a dict of tracking_no -> page; numbers the page does not mention are left out
+		'''
+		starts = []
+		for tracking_no in tracking_nos:
+			pattern = cls.batch_section_start.format(re.escape(tracking_no))
+			if isinstance(page,bytes):
+				pattern = pattern.encode('utf-8')		# a tracker that keeps the raw bytes
+			match = re.search(pattern,page)
+			if match is not None:
+				starts.append((match.start(),tracking_no))
+
+		# Each shipment's part runs till the next shipment's part begins
+		starts.sort()
+		ends = [start for start, _ in starts[1:]] + [len(page)]
+
+		return dict((tracking_no, page[start:end]) for (start, tracking_no), end in zip(starts,ends))
+
+	@classmethod
+	def Track_Batch(cls,tracking_nos,batch_size=None):
+		'''
+			Tracks many shipments, packing up to batch_size tracking numbers into each request.
+			Returns the trackers in the order of tracking_nos. A shipment that could not be
+			tracked does not stop the rest of the batch, its exception is stored in tracker.error
+		'''
+		batch_size = min(batch_size or cls.max_batch_size, cls.max_batch_size)
+		trackers = [cls(tracking_no) for tracking_no in tracking_nos]
+
+		# Only the shipments not in the cache need to be fetched
+		pending = [tracker for tracker in trackers if not tracker.from_cache()]
+
+		for first in range(0, len(pending), batch_size):
+			batch = pending[first:first + batch_size]
+
+			if len(batch) == 1 or cls.archive_replay:
+				# Nothing to split (archived pages are kept per shipment), track each on its own
+				for tracker in batch:
+					try:
+						tracker.Get_Tracking_Data()
+					except Exception as e:
+						tracker.error = e
+				continue
+
+			# A tracker for all the joined numbers sends the one request for the batch
+			numbers = [tracker.tracking_no for tracker in batch]
+			batch_tracker = cls(cls.batch_separator.join(numbers))
+			try:
+				with batch_tracker.timed('fetch'):
+					batch_tracker.paced_get_page()
+				pages = cls.Split_Batch_Page(batch_tracker.page,numbers)
+			except Exception as e:
+				for tracker in batch:
+					tracker.error = e
+				continue
+
+			for tracker in batch:
+				tracker.page = pages.get(tracker.tracking_no)
+				if tracker.page is None:
+					tracker.error = ValueError('The Tracking number is invalid')
+					continue
+				tracker.count_page()
+				tracker.archive_page()
+				try:
+					tracker.extract_checkpoints()
+				except Exception as e:
+					tracker.error = e
+					continue
+
+				if cls.result_cache is not None:
+					cls.result_cache.put(tracker.carrier,tracker.tracking_no,tracker.status,tracker.tracking_data)
+
+		return trackers
 
 class BluedartTracker(Tracker):
 	'''
@@ -39,12 +457,21 @@ class BluedartTracker(Tracker):
 	'''
 	exclude_list = ['Location','Date','Waybill','Details','No.']
 
+	max_batch_size = 25
+	batch_section_start = r'Waybill No[^0-9]*{}(?!\d)'	# each shipment's table opens with its waybill number
+
+	carrier = 'bluedart'
+	home_url = 'http://www.bluedart.com/'
+	number_patterns = [r'\d{11}']
+	number_prior = 3.0
+	date_parser = dates.DateParser(["%d-%b-%Y %H:%M"])
+
 	def __init__(self,tracking_no):
 		Tracker.__init__(self,tracking_no)
 
-	def Get_Page(self):
+	def Build_Request(self):
 		'''
-			Fetches raw HTML data from the site for a given tracking_no
+			The request for the raw HTML data of a given tracking_no
 		'''
 
 		url = 'http://www.bluedart.com/servlet/RoutingServlet'
@@ -53,9 +480,7 @@ class BluedartTracker(Tracker):
 		          'awb' : 'awb' ,
 		          'numbers' : self.tracking_no}
 
-		# request the server for the HTML data
-		response = requests.post(url,data=data,verify=False)
-		self.page = response.content
+		return 'POST', url, {'data':data,'verify':False}
 
 	def is_valid(self,text):
 		for unwanted in self.exclude_list:
@@ -76,8 +501,6 @@ class BluedartTracker(Tracker):
 		if 'Numbers Not Found -'in self.page or 'Invalid Query Numbers -' in self.page:
 			raise ValueError('The Tracking number is invalid')
 
-		soup = BeautifulSoup(self.page,'html.parser')
-
 		# Assign the current status of the shipment
 		if 'Returned To Origin' in self.page:		 # Prioritise this first
 			self.status = 'R'
@@ -87,20 +510,10 @@ class BluedartTracker(Tracker):
 			self.status = 'T'						
 
 		# Checkpoints extraction begins here 
-		cells = []
-
-		'''
-			The below for loop goes through the table of checkpoints adding relevant cell data to cells[]
-		'''
-
-		for cell in soup.findAll('td', {"align" : "LEFT"}):
-		    if cell.font["size"] == '1':
-		    	cell_text = cell.font.string
-		    	if self.is_valid(cell_text):
-		    		cells.append(cell_text)
+		cells = [cell_text for cell_text in self.parse_page() if self.is_valid(cell_text)]
 
 		# 4 cells in each row
-		rows = [cells[cell:cell + 4] for cell in xrange(0, len(cells), 4)]
+		rows = [cells[cell:cell + 4] for cell in range(0, len(cells), 4)]
 
 		for row in rows:
 
@@ -113,35 +526,53 @@ class BluedartTracker(Tracker):
 			location = row[0]
 			status = row[1]
 			date_time = ' '.join((row[2],row[3]))
-			date_time_format = "%d-%b-%Y %H:%M"
-			date_time = datetime.strptime(date_time,date_time_format)
+			date_time = self.date_parser(date_time)
 
-			self.tracking_data.append({'status':status,'date':date_time,'location':location})
+			self.tracking_data.append(Checkpoint(status,date_time,location))
 
 		# Sort the checkpoints based on Date and Time --- this is important
-		self.tracking_data = sorted(self.tracking_data, key=lambda k: k['date'])
+		self.sort_checkpoints()
+
+	def parse_soup(self):
+		'''
+			Goes through the table of checkpoints and returns the text of the cells holding checkpoint data
+		'''
+		soup = bs4.BeautifulSoup(self.page,'html.parser')
+
+		return [cell.font.string for cell in soup.findAll('td', {"align" : "LEFT"}) if cell.font["size"] == '1']
+
+	def parse_lxml(self):
+		tree = parsers.html_tree(self.page)
+		fonts = [cell.find('.//font') for cell in parsers.xpath("//td[@align='LEFT']")(tree)]
+
+		return [parsers.string_of(font) for font in fonts if font.get('size') == '1']
 
 class AramexTracker(Tracker):
 	'''
 	    This class scrapes data from the Aramex website    	
 	'''
+	max_batch_size = 10
+
+	carrier = 'aramex'
+	number_patterns = [r'\d{10,12}']
+	driver_pool = browsers.pool
+	wait_strategy = browsers.PollingWait()		# how to tell the page is ready, see trackit.browsers
+	date_parser = dates.DateParser(["%d-%b-%Y %H:%M"],fallback='dateutil')
+
 	def __init__(self, tracking_no):
 		Tracker.__init__(self,tracking_no)
 
-	def wait_till_page_load(self,driver,max_wait_time):
+	def wait_till_page_load(self,driver,max_wait_time=None):
 		'''
 			This method pauses execution until the page is loaded fully, including
 			data delayed by JavaScript
 		'''
-		sleepCount = max_wait_time		# wait for a fixed max_wait_time only 
 
-		# A page that's fully loaded has the word 'Current Status'
+		# A page that's fully loaded has the word 'Current Status', unless the number is invalid
+		markers = ['Current Status','Invalid number / data not currently available']
 
-		while 'Current Status' not in driver.page_source:		
-			sleep(1)
-			sleepCount -= 1
-			if sleepCount is 0:
-				raise Exception('Request timed out!')		# if max_wait_time is exceeded!
+		with self.timed('wait'):
+			self.wait_strategy.wait_for_markers(driver,markers,max_wait_time)
 
 	def remove_non_ascii(self,str_to_clean):				
 		return ''.join([x for x in str_to_clean if ord(x) < 128])
@@ -155,11 +586,13 @@ class AramexTracker(Tracker):
 		url = 'https://www.aramex.com/express/track-results-multiple.aspx?ShipmentNumber='
 		url += self.tracking_no
 
-		driver = webdriver.PhantomJS()			# create a selenium webdriver
-		driver.get(url)							# make it send a request with the above url
-		self.wait_till_page_load(driver,10)		# wait till the page is fully loaded
-		self.page = driver.page_source		# store the html source
-		driver.quit()							# stop the webdriver
+		with self.leased():						# borrow a running selenium webdriver, unless fetch_page did
+			driver = self.driver
+			# whatever is left of request_timeout after waiting for a free browser
+			driver.set_page_load_timeout(max(self.request_timeout - (default_timer() - self.leased_at),1))
+			driver.get(url)							# make it send a request with the above url
+			self.wait_till_page_load(driver)		# wait till the page is fully loaded
+			self.page = driver.page_source		# store the html source
 
 	def Extract_Checkpoints(self):
 		'''
@@ -176,11 +609,11 @@ class AramexTracker(Tracker):
 
 		# Checkpoints extraction begins here 
 		
-		soup = BeautifulSoup(self.page,'html.parser')
+		current_status, rows = self.parse_page()
 		
 		# Assign the current status of the shipment - self.status
 
-		current_status = soup.find('span',id='spnCurrentStatusValue').text.strip()
+		current_status = current_status.strip()
 		if current_status == 'Supporting Document Returned to Shipper':	
 			self.status = 'R'
 		elif current_status == 'Delivered':
@@ -188,50 +621,82 @@ class AramexTracker(Tracker):
 		else:											 # The shipment is in Transit
 			self.status = 'T'
 
-		# Get all rows of the Checkpoints table (no particular order)
-		rows = soup.findAll('div',{'class':'fullWidth odd leftFloat bottomGreyBorder'})
-		rows += soup.findAll('div',{'class':'fullWidth even leftFloat bottomGreyBorder'})
-
-		for row in rows:
+		for location, date_time, status in rows:
 			# Get the data
 
-			location = row.find('div',{'class':'leftFloat thirdWidth'}).string.strip()
-			date_time = row.find('div',{'class':'leftFloat shipmentSummaryLabel'}).string.strip()
-			status = row.find('div',{'class':'leftFloat shipmentHistoryActivityLabel'}).string.strip()
+			location = location.strip()
+			date_time = date_time.strip()
+			status = status.strip()
 
 			# Clean it
 			location = self.remove_non_ascii(location)
-			date_time_format = "%d-%b-%Y %H:%M"
-			date_time = parse(self.remove_non_ascii(date_time))
+			date_time = self.date_parser(self.remove_non_ascii(date_time))
 			status = self.remove_non_ascii(status)
 
 			# Add it to the checkpoint list
-			self.tracking_data.append({'status':status,'date':date_time,'location':location})
+			self.tracking_data.append(Checkpoint(status,date_time,location))
+
+		self.sort_checkpoints()
+
+	def parse_soup(self):
+		'''
+			Returns the current status and the (location, date_time, status) of each checkpoint
+		'''
+		soup = bs4.BeautifulSoup(self.page,'html.parser')
+
+		current_status = soup.find('span',id='spnCurrentStatusValue').text
+
+		# Get all rows of the Checkpoints table (no particular order)
+		rows = soup.findAll('div',{'class':'fullWidth odd leftFloat bottomGreyBorder'})
+		rows += soup.findAll('div',{'class':'fullWidth even leftFloat bottomGreyBorder'})
+
+		return current_status, [(row.find('div',{'class':'leftFloat thirdWidth'}).string,
+								row.find('div',{'class':'leftFloat shipmentSummaryLabel'}).string,
+								row.find('div',{'class':'leftFloat shipmentHistoryActivityLabel'}).string) for row in rows]
+
+	def parse_lxml(self):
+		tree = parsers.html_tree(self.page)
+		xpath = parsers.xpath
+
+		current_status = parsers.text_of(xpath("//span[@id='spnCurrentStatusValue']")(tree)[0])
 
-		self.tracking_data = sorted(self.tracking_data, key=lambda k: k['date'])
+		rows = xpath("//div[normalize-space(@class)='fullWidth odd leftFloat bottomGreyBorder']")(tree)
+		rows += xpath("//div[normalize-space(@class)='fullWidth even leftFloat bottomGreyBorder']")(tree)
+
+		location = xpath(".//div[normalize-space(@class)='leftFloat thirdWidth']")
+		date_time = xpath(".//div[normalize-space(@class)='leftFloat shipmentSummaryLabel']")
+		status = xpath(".//div[normalize-space(@class)='leftFloat shipmentHistoryActivityLabel']")
+
+		return current_status, [(parsers.string_of(location(row)[0]),
+								parsers.string_of(date_time(row)[0]),
+								parsers.string_of(status(row)[0])) for row in rows]
 
 class DHLTracker(Tracker):
 	'''
 	    This class scrapes data from the DHL website    	
 	'''
+	carrier = 'dhl'
+	number_patterns = [r'\d{10}']
+	number_prior = 2.0
+	driver_pool = browsers.pool
+	wait_strategy = browsers.PollingWait()		# how to tell the page is ready, see trackit.browsers
+	day_parser = dates.DateParser(["%A, %B %d, %Y"],fallback=None)
+	time_parser = dates.DateParser(["%H:%M"],fallback=None)
 
 	def __init__(self, tracking_no):
 		Tracker.__init__(self,tracking_no)
 
-	def wait_till_page_load(self,driver,max_wait_time):
+	def wait_till_page_load(self,driver,max_wait_time=None):
 		'''
 			This method pauses execution until the page is loaded fully, including
 			data delayed by JavaScript
 		'''
-		sleepCount = max_wait_time		# wait for a fixed max_wait_time only 
 
-		# A page that's fully loaded has the word 'Current Status'
+		# A page that's fully loaded has the tracking number in it, or says the input is invalid
+		markers = [self.tracking_no,'Invalid Input']
 
-		while self.tracking_no not in driver.page_source and 'Invalid Input' not in driver.page_source:		
-			sleep(1)
-			sleepCount -= 1
-			if sleepCount is 0:
-				raise Exception('Request timed out!')		# if max_wait_time is exceeded!
+		with self.timed('wait'):
+			self.wait_strategy.wait_for_markers(driver,markers,max_wait_time)
 
 	def Get_Page(self):
 		'''
@@ -241,11 +706,13 @@ class DHLTracker(Tracker):
 		# Simply encode the correct url as a string
 		url = 'http://www.dhl.co.in/en/express/tracking.html?AWB={}&brand=DHL'.format(self.tracking_no)
 
-		driver = webdriver.PhantomJS()			# create a selenium webdriver
-		driver.get(url)							# make it send a request with the above url
-		self.wait_till_page_load(driver,10)		# wait till the page is fully loaded
-		self.page = driver.page_source		# store the html source
-		driver.quit()							# stop the webdriver
+		with self.leased():						# borrow a running selenium webdriver, unless fetch_page did
+			driver = self.driver
+			# whatever is left of request_timeout after waiting for a free browser
+			driver.set_page_load_timeout(max(self.request_timeout - (default_timer() - self.leased_at),1))
+			driver.get(url)							# make it send a request with the above url
+			self.wait_till_page_load(driver)		# wait till the page is fully loaded
+			self.page = driver.page_source		# store the html source
 
 	def Extract_Checkpoints(self):
 		'''
@@ -256,10 +723,9 @@ class DHLTracker(Tracker):
 		if self.page is None:
 			raise Exception("The HTML data was not fetched due to some reasons")
 
-		soup = BeautifulSoup(self.page,'html.parser')
-
 		# Check for invalid tracking number by checking if table element is present
-		if soup.find('thead') == None:
+		table = self.parse_page()
+		if table == None:
 			raise ValueError('Invalid tracking number')
 
 		
@@ -272,43 +738,96 @@ class DHLTracker(Tracker):
 		else:											 # The shipment is in Transit
 			self.status = 'T'
 
+		cur_date = None		# The date of the next few checkpoints, initially None
+		for element in table:
+			if element[0] == 'thead':
+				# This has the date for the next few checkpoints
+				cur_date = element[1].strip() + ' '
+
+			elif element[0] == 'tbody':
+				# A checkpoint whose date = cur_date
+				tds = element[1]
+				status = tds[1].strip()
+				location = tds[2].strip()
+				date_time = self.parse_date_time(cur_date,tds[3].strip())
+				self.tracking_data.append(Checkpoint(status,date_time,location))
+
+		self.sort_checkpoints()
+
+	def parse_date_time(self,cur_date,time):
+		'''
+			All the checkpoints under a thead share its date, so the date is parsed once (and
+			remembered) and only the time of each checkpoint is parsed on its own.
+			Anything in an unexpected format is left to dateutil
+		'''
+		try:
+			return datetime.combine(self.day_parser(cur_date.strip()).date(),self.time_parser(time).time())
+		except ValueError:
+			return dateutil_parser.parse(cur_date + time)
+
+	def parse_soup(self):
+		'''
+			Returns the checkpoints table as a list of ('thead', date) and ('tbody', cell texts)
+			in the order they appear, or None if the page has no table
+		'''
+		soup = bs4.BeautifulSoup(self.page,'html.parser')
+
+		if soup.find('thead') == None:
+			return None
+
 		# The full checkpoints table div.
 		table = soup.find('table',{'class':'result-checkpoints'}).contents
-		cur_date = None		# The date of the next few checkpoints, initially None
-		checkpoint = None
+		elements = []
 
 		for element in table:
 			if element.name == 'thead':
-				# This has the date for the next few checkpoints
-				cur_date = element.find('th',{'colspan':'2'}).string.strip() + ' '
-
+				elements.append(('thead',element.find('th',{'colspan':'2'}).string))
 			elif element.name == 'tbody':
-				# A checkpoint whose date = cur_date
-				checkpoint = {'status':'','date':cur_date,'location':''}
-				tds = element.findAll('td')
-				checkpoint['status'] = tds[1].string.strip()
-				checkpoint['location'] = tds[2].string.strip()
-				checkpoint['date'] += tds[3].string.strip()
-				date_time_format = "%d-%b-%Y %H:%M"
-				checkpoint['date'] = parse(checkpoint['date'])
-				self.tracking_data.append(checkpoint)
+				elements.append(('tbody',[td.string for td in element.findAll('td')]))
+
+		return elements
+
+	def parse_lxml(self):
+		tree = parsers.html_tree(self.page)
+		xpath = parsers.xpath
+
+		if not xpath('//thead')(tree):
+			return None
 
-		self.tracking_data = sorted(self.tracking_data, key=lambda k: k['date'])
+		table = xpath('//table[{}]'.format(parsers.has_class('result-checkpoints')))(tree)[0]
+		th = xpath(".//th[@colspan='2']")
+		td = xpath('.//td')
+		elements = []
+
+		for element in table:
+			if element.tag == 'thead':
+				elements.append(('thead',parsers.string_of(th(element)[0])))
+			elif element.tag == 'tbody':
+				elements.append(('tbody',[parsers.string_of(cell) for cell in td(element)]))
+
+		return elements
 
 class Skynet_Tracker(Tracker):
 	'''
 		This class scrapes tracking data from the Skynet website.
 	'''
+	carrier = 'skynet'
+	home_url = 'https://www.skynetwwe.info/'
+	number_patterns = [r'\d{8,12}',r'[A-Za-z]{2,3}\d{6,10}']
+	number_prior = 0.5
+	date_parser = dates.DateParser(["%d %b %Y %H:%M"])
+	form_session = sessions.FormSession('https://www.skynetwwe.info/ShipmentTrackSingle.aspx',verify=False)
 
 	def __init__(self,tracking_no):
 		Tracker.__init__(self,tracking_no)
 
-	def Get_Page(self):
+	def Build_Request(self):
 		'''
-			Fetches raw HTML data from the site for a given tracking_no
+			The request for the raw HTML data of a given tracking_no
 		'''
 
 		url = 'https://www.skynetwwe.info/ShipmentTrackSingle.aspx?textfield={}&radiobutton=SB'.format(self.tracking_no)
+		state = self.load_form_state()			# the shared ASP.NET session
 
 		headers = {
 					'Host': 'www.skynetwwe.info',
@@ -317,14 +836,11 @@ class Skynet_Tracker(Tracker):
 					'Accept-Language': 'en-US,en;q=0.5',
 					'Accept-Encoding': 'gzip, deflate',
 					'DNT': '1',
-					'Cookie': 'ASP.NET_SessionId=aletb2fx1kqixq55kmblbvn4',
 					'Connection': 'keep-alive',
 					'Cache-Control': 'max-age=0'
 				   }
 		
-		# request the server for the HTML data
-		response = requests.post(url,headers=headers,verify=False)
-		self.page = response.content
+		return 'POST', url, {'headers':headers,'cookies':state['cookies'],'verify':False}
 
 	def Extract_Checkpoints(self):
 		'''
@@ -335,10 +851,8 @@ class Skynet_Tracker(Tracker):
 		if self.page is None:
 			raise Exception("The HTML data was not fetched due to some reasons")
 
-		soup = BeautifulSoup(self.page,'html.parser')
-
-		invalid_tracking_no = soup.find('span',{'id':'ctl00_ContentPlaceHolder1_lblsMsg','class':'ErrorMessage','style':'font-family:Calibri;font-size:9pt;font-weight:bold;','name':'lblsMsg'})
-		if invalid_tracking_no is not None:
+		invalid_tracking_no, rows = self.parse_page()
+		if invalid_tracking_no:
 			raise ValueError('The Tracking number is invalid')
 
 		# Assign the current status of the shipment
@@ -350,56 +864,85 @@ class Skynet_Tracker(Tracker):
 
 		# Checkpoints extraction begins here 
 		
-		rows = soup.findAll('tr',{'class':'gridItem'}) + soup.findAll('tr',{'class':'gridAltItem'})
-
-		for row in rows:
+		for row_cells in rows:
 
 			'''
 				Each row will have 4 columns: Date--Time--Status--Location
 				Merge column one and two and format it. 
 				Append to tracking_data list
 			'''
-			row_cells = row.findAll('td')
-
-			date = row_cells[0].string.strip()
-			time = row_cells[1].string.strip()
+			date = row_cells[0].strip()
+			time = row_cells[1].strip()
 			date_time = ' '.join([date,time])
-			date_time_format = "%d %b %Y %H:%M"
-			date_time = datetime.strptime(date_time,date_time_format)
-			status = row_cells[2].string.strip()
-			location = row_cells[3].string.strip()
+			date_time = self.date_parser(date_time)
+			status = row_cells[2].strip()
+			location = row_cells[3].strip()
 			
-			self.tracking_data.append({'status':status,'date':date_time,'location':location})
+			self.tracking_data.append(Checkpoint(status,date_time,location))
 
 		# Sort the checkpoints based on Date and Time --- this is important
-		self.tracking_data = sorted(self.tracking_data, key=lambda k: k['date'])
+		self.sort_checkpoints()
+
+	def parse_soup(self):
+		'''
+			Returns whether the page says the number is invalid, and the cell texts of each checkpoint row
+		'''
+		soup = bs4.BeautifulSoup(self.page,'html.parser')
+
+		invalid_tracking_no = soup.find('span',{'id':'ctl00_ContentPlaceHolder1_lblsMsg','class':'ErrorMessage','style':'font-family:Calibri;font-size:9pt;font-weight:bold;','name':'lblsMsg'})
+
+		rows = soup.findAll('tr',{'class':'gridItem'}) + soup.findAll('tr',{'class':'gridAltItem'})
+
+		return invalid_tracking_no is not None, [[cell.string for cell in row.findAll('td')] for row in rows]
+
+	def parse_lxml(self):
+		tree = parsers.html_tree(self.page)
+		xpath = parsers.xpath
+
+		invalid_tracking_no = xpath("//span[@id='ctl00_ContentPlaceHolder1_lblsMsg' and {} and "
+									"@style='font-family:Calibri;font-size:9pt;font-weight:bold;' and "
+									"@name='lblsMsg']".format(parsers.has_class('ErrorMessage')))(tree)
+
+		rows = xpath('//tr[{}]'.format(parsers.has_class('gridItem')))(tree)
+		rows += xpath('//tr[{}]'.format(parsers.has_class('gridAltItem')))(tree)
+		td = xpath('.//td')
+
+		return bool(invalid_tracking_no), [[parsers.string_of(cell) for cell in td(row)] for row in rows]
 
 class Overnite_Tracker(Tracker):
 	'''
 		This class scrapes tracking data from the Overnite express website.
 	'''
+	carrier = 'overnite'
+	home_url = 'http://www.overnitenet.com/'
+	number_patterns = [r'\d{8,12}']
+	number_prior = 0.5
+	date_parser = dates.DateParser(["%A, %B %d, %Y"])
+	form_session = sessions.FormSession('http://www.overnitenet.com/Web-Track.aspx')
 
 	def __init__(self,tracking_no):
 		Tracker.__init__(self,tracking_no)
 
-	def Get_Page(self):
+	def Build_Request(self):
 		'''
-			Fetches raw HTML data from the site for a given tracking_no
+			The request for the raw HTML data of a given tracking_no
 		'''
 
 		url = 'http://www.overnitenet.com/Web-Track.aspx'
+		state = self.load_form_state()			# the shared __VIEWSTATE, __EVENTVALIDATION and session
 
 		data = {
 			'__EVENTTARGET':'',
 			'__EVENTARGUMENT':'',
-			'__VIEWSTATE':'/wEPDwUKLTY0MDE3NTA3NWQYAQUeX19Db250cm9sc1JlcXVpcmVQb3N0QmFja0tleV9fFgQFFWN0bDAwJENvbnRlbnQkcmRBd2JObwUVY3RsMDAkQ29udGVudCRyZFJlZk5vBRVjdGwwMCRDb250ZW50JHJkUmVmTm8FGWN0bDAwJENvbnRlbnQkaW1nYnRuVHJhY2uCRZzZgz3GDGJ/LncXvzFMpEh90g==',
-			'__EVENTVALIDATION':'/wEWBgKc68neCQLx5f2jAQKYpPrsCgKcioujBgL2vJr6BALJ97buCl91xQYFzc1Hb3E2f/BkGHccMKCx',
+		}
+		data.update(state['fields'])
+		data.update({
 			'ctl00$Content$rb':'rdAwbNo',
 			'ctl00$Content$txtAWB':self.tracking_no,
 			'ctl00$Content$ValidatorCalloutExtender6_ClientState':'',
 			'ctl00$Content$imgbtnTrack.x':'28',
 			'ctl00$Content$imgbtnTrack.y':'8'
-		}
+		})
 
 		headers = {
 			'Host': 'www.overnitenet.com',
@@ -409,14 +952,10 @@ class Overnite_Tracker(Tracker):
 			'Accept-Encoding': 'gzip, deflate',
 			'DNT': '1',
 			'Referer': 'http://www.overnitenet.com/Web-Track.aspx',
-			'Cookie': 'ASP.NET_SessionId=3ncsag55xq0z4vqltg3egbr4',
 			'Connection': 'keep-alive'
 		}
 
-		# request the server for the HTML data
-		response = requests.post(url,data=data,headers=headers,verify=False)
-
-		self.page = response.content
+		return 'POST', url, {'data':data,'headers':headers,'cookies':state['cookies'],'verify':False}
 
 	def Extract_Checkpoints(self):
 		'''
@@ -427,8 +966,6 @@ class Overnite_Tracker(Tracker):
 		if self.page is None:
 			raise Exception("The HTML data was not fetched due to some reasons")
 
-		soup = BeautifulSoup(self.page,'html.parser')
-
 		if 'Delivery information not found' in self.page:
 			raise ValueError('The Tracking number is invalid/Tracking number is over 45 days old.')
 
@@ -441,38 +978,73 @@ class Overnite_Tracker(Tracker):
 
 		# Checkpoints extraction begins here 
 		
-		table = soup.findAll('table',{'cellpadding':'1','cellspacing':'1','border':'1','align':'center','style':"width:800px;border-color:#034291;"})[1]
-		rows = table.findAll('tr')[1:]
-
-		for row in rows:
+		for date, location, status in self.parse_page():
 
 			'''
 				Each row will have 3 columns: Date--Location--Status
 			'''
-			row_cells = row.findAll('td')
-			date = row_cells[0].string.strip()
-			date = datetime.strptime(date,"%A, %B %d, %Y")
-			location = row_cells[1].find('a').string.strip()
-			if location is '':		# ignore the days which are holidays
+			date = date.strip()
+			date = self.date_parser(date)
+			location = location.strip()
+			if location == '':		# ignore the days which are holidays
 				continue
-			status = row_cells[2].text.strip()
+			status = status.strip()
 			
-			self.tracking_data.append({'status':status,'date':date,'location':location})
+			self.tracking_data.append(Checkpoint(status,date,location))
 
 		# Sort the checkpoints based on Date and Time --- this is important
-		self.tracking_data = sorted(self.tracking_data, key=lambda k: k['date'])
+		self.sort_checkpoints()
+
+	def parse_soup(self):
+		'''
+			Returns the (date, location, status) texts of each row of the checkpoints table
+		'''
+		soup = bs4.BeautifulSoup(self.page,'html.parser')
+
+		table = soup.findAll('table',{'cellpadding':'1','cellspacing':'1','border':'1','align':'center','style':"width:800px;border-color:#034291;"})[1]
+		rows = []
+
+		for row in table.findAll('tr')[1:]:
+			row_cells = row.findAll('td')
+			rows.append((row_cells[0].string, row_cells[1].find('a').string, row_cells[2].text))
+
+		return rows
+
+	def parse_lxml(self):
+		tree = parsers.html_tree(self.page)
+		xpath = parsers.xpath
+
+		table = xpath("//table[@cellpadding='1' and @cellspacing='1' and @border='1' and @align='center' and "
+					  "@style='width:800px;border-color:#034291;']")(tree)[1]
+		td = xpath('.//td')
+		rows = []
+
+		for row in xpath('.//tr')(table)[1:]:
+			row_cells = td(row)
+			rows.append((parsers.string_of(row_cells[0]),
+						 parsers.string_of(row_cells[1].find('.//a')),
+						 parsers.text_of(row_cells[2])))
+
+		return rows
 
 class Ecomm_Tracker(Tracker):
 	'''
 		This class scrapes tracking data from the Ecomm express website.
 	'''
+	max_batch_size = 20
+
+	carrier = 'ecomm'
+	home_url = 'https://billing.ecomexpress.in/'
+	number_patterns = [r'\d{9,10}']
+	number_prior = 2.0
+	date_parser = dates.DateParser(["%d-%m-%Y | %H:%M:%S"])
 
 	def __init__(self,tracking_no):
 		Tracker.__init__(self,tracking_no)
 
-	def Get_Page(self):
+	def Build_Request(self):
 		'''
-			Fetches raw HTML data from the site for a given tracking_no
+			The request for the raw HTML data of a given tracking_no
 		'''
 
 		url = 'https://billing.ecomexpress.in/track_me/multipleawb_open/?awb={}&order=&news_go=track+now'.format(self.tracking_no)
@@ -492,10 +1064,7 @@ class Ecomm_Tracker(Tracker):
 			'Connection': 'keep-alive'
 		}
 
-		# request the server for the HTML data
-		response = requests.get(url,data=data,headers=headers,verify=False)
-
-		self.page = response.content
+		return 'GET', url, {'data':data,'headers':headers,'verify':False}
 
 	def Extract_Checkpoints(self):
 		'''
@@ -506,18 +1075,14 @@ class Ecomm_Tracker(Tracker):
 		if self.page is None:
 			raise Exception("The HTML data was not fetched due to some reasons")
 
-		# use a different parser, page contains broken HTML
-		soup = BeautifulSoup(self.page,'html5lib') 
-
 		if self.tracking_no not in self.page:
 			raise ValueError('The Tracking number is invalid.')
 
 		# Assign the current status of the shipment
-		table = soup.find('table',{'class':'table'}).find('tbody')
-		rows = table.findAll('tr')
+		rows = self.parse_page()
 
-		present_status = rows[0].findAll('td')[1].text.strip()
-		if present_status is 'Delivered':
+		present_status = rows[0][1].strip()
+		if present_status == 'Delivered':
 			self.status = 'C'
 		elif 'Shipment Redirected under' in present_status:
 			self.status = 'R'
@@ -526,47 +1091,160 @@ class Ecomm_Tracker(Tracker):
 
 		# Checkpoints extraction begins here 
 
-		for row in rows:
+		for row_cells in rows:
 			'''
 				Each row will have 2 columns: (Date|Time, Location) --- (Status)
 			'''
-			row_cells = row.findAll('td')
-			date,location = row_cells[0].string.strip().split(' ,  ')
-			date = datetime.strptime(date,"%d-%m-%Y | %H:%M:%S")
-			status = row_cells[1].text.strip()
+			date,location = row_cells[0].strip().split(' ,  ')
+			date = self.date_parser(date)
+			status = row_cells[1].strip()
 			
-			self.tracking_data.append({'status':status,'date':date,'location':location})
+			self.tracking_data.append(Checkpoint(status,date,location))
 
 		# Sort the checkpoints based on Date and Time --- this is important
-		self.tracking_data = sorted(self.tracking_data, key=lambda k: k['date'])
+		self.sort_checkpoints()
+
+	def parse_soup(self):
+		'''
+			Returns the (date and location, status) texts of each row of the checkpoints table
+		'''
+
+		# use a different parser, page contains broken HTML
+		soup = bs4.BeautifulSoup(self.page,'html5lib') 
+
+		table = soup.find('table',{'class':'table'}).find('tbody')
+		rows = []
+
+		for row in table.findAll('tr'):
+			row_cells = row.findAll('td')
+			rows.append((row_cells[0].string, row_cells[1].text))
+
+		return rows
+
+	def parse_lxml(self):
+		tree = parsers.html_tree(self.page)
+		xpath = parsers.xpath
+
+		table = xpath('//table[{}]'.format(parsers.has_class('table')))(tree)[0]
+
+		# html5lib puts rows outside of any table section in a tbody of their own, which lxml doesn't
+		body = xpath('.//tbody')(table)
+		td = xpath('.//td')
+		rows = []
+
+		for row in xpath('.//tr')(body[0]) if body else xpath('tr')(table):
+			row_cells = td(row)
+			rows.append((parsers.string_of(row_cells[0]), parsers.text_of(row_cells[1])))
+
+		return rows
 
 class Gati_Tracker(Tracker):
 	'''
 		This class scrapes tracking data from the Gati website.
 	'''
+	carrier = 'gati'
+	home_url = 'http://www.gati.com/'
+	number_patterns = [r'\d{9,10}']
+	date_parser = dates.DateParser(["%d-%b-%Y %H:%M"])
+	conditional_requests = True
 
 	def __init__(self,tracking_no):
 		Tracker.__init__(self,tracking_no)
 
-	def Get_Page(self):
+	def Build_Request(self):
 		'''
-			Fetches raw XML data from the site for a given tracking_no
+			The request for the raw XML data of a given tracking_no
 		'''
 		url = 'http://www.gati.com/webservices/gatiicedkttrack.jsp?dktno=' + self.tracking_no
-		response = requests.get(url)
 
-		self.page = response.text
+		return 'GET', url, {}
 
 	def Extract_Checkpoints(self):
 		'''
 			Extract the checkpoints and store in self.tracking_data
 		'''
-		soup = BeautifulSoup(self.page,'xml')
+		result, status, rows = self.parse_page()
 
-		if soup.find('result').string.strip() == 'failed':
+		if result.strip() == 'failed':
 			raise ValueError('The Tracking number is invalid.')
 
-		status = soup.find('DOCKET_STATUS').string.strip()
+		self.set_status(status)
+
+		# Checkpoints extraction begins here
+		for row in rows:
+			self.tracking_data.append(self.make_checkpoint(*row))
+
+		# Sort the checkpoints based on Date and Time --- this is important
+		self.sort_checkpoints()
+
+	def Stream_Checkpoints(self,chunk_size=8192):
+		'''
+			Fetches the XML data and yields each checkpoint as soon as its ROW has been read,
+			without keeping the response or the rows already read in memory.
+			status is set once the docket status is read, and tracking_data holds all the
+			checkpoints, sorted, once the last one has been yielded. self.page is not kept
+		'''
+		method, url, options = self.Build_Request()
+		with self.limiter.request():
+			response = self.session.request(method,url,stream=True,timeout=self.request_timeout,**options)
+			if response.status_code == 429 or response.status_code >= 500:
+				response.raise_for_status()
+
+		try:
+			for checkpoint in self.iter_checkpoints(response.iter_content(chunk_size)):
+				yield checkpoint
+		finally:
+			response.close()
+
+	def iter_checkpoints(self,chunks):
+		'''
+			Parses the XML data as it arrives in chunks, yielding the checkpoint of each ROW
+			as it closes. Each ROW is thrown away once read
+		'''
+		parser = ElementTree.XMLPullParser(events=('start','end'))
+		parents = []		# the elements open at this point of the document
+		self.tracking_data = []
+
+		def text(row,name):
+			for child in row:
+				if child.tag.rsplit('}',1)[-1] == name:
+					return child.text
+			return None
+
+		for chunk in chunks:
+			parser.feed(chunk)
+
+			for event, element in parser.read_events():
+				if event == 'start':
+					parents.append(element)
+					continue
+
+				parents.pop()
+				name = element.tag.rsplit('}',1)[-1]		# without any namespace
+
+				if name == 'result' and element.text.strip() == 'failed':
+					raise ValueError('The Tracking number is invalid.')
+
+				elif name == 'DOCKET_STATUS':
+					self.set_status(element.text)
+
+				elif name == 'ROW':
+					checkpoint = self.make_checkpoint(text(element,'INTRANSIT_DATE'), text(element,'INTRANSIT_TIME'),
+													  text(element,'INTRANSIT_LOCATION'), text(element,'INTRANSIT_STATUS'))
+					parents[-1].remove(element)
+					self.tracking_data.append(checkpoint)
+					yield checkpoint
+
+		parser.close()
+
+		# Sort the checkpoints based on Date and Time --- this is important
+		self.sort_checkpoints()
+
+	def set_status(self,status):
+		'''
+			Assign the current status of the shipment from the docket status
+		'''
+		status = status.strip()
 
 		if status == 'Delivered':
 			self.status = 'C'
@@ -575,28 +1253,54 @@ class Gati_Tracker(Tracker):
 		else:
 			self.status = 'T'
 
-		# Checkpoints extraction begins here
-		rows = soup.findAll('ROW')
+	def make_checkpoint(self,date,time,location,status):
+		'''
+			Each row has four columns:
+				date --- time --- location --- status
+			Merge #1 and #2
+			Returns the checkpoint of the 3
+		'''
+		date = date.strip()
+		time = time.strip()
+		try:
+			location = location.strip()
+		except AttributeError:
+			location = ''
+		status = status.strip()
+		date_time = self.date_parser(' '.join([date,time]))
+
+		return Checkpoint(status,date_time,location)
+
+	def parse_soup(self):
+		'''
+			Returns the result and docket status texts, and the (date, time, location, status)
+			texts of each ROW. The location is None when a ROW doesn't have one
+		'''
+		soup = bs4.BeautifulSoup(self.page,'xml')
 
-		for row in rows:
-			'''
-				Each row has four columns:
-					date --- time --- location --- status
-				Merge #1 and #2
-				Append the 3 to self.tracking_data
-			'''
-			date = row.find('INTRANSIT_DATE').string.strip()
-			time = row.find('INTRANSIT_TIME').string.strip()
-			try:
-				location = row.find('INTRANSIT_LOCATION').string.strip()
-			except AttributeError:
-				location = ''
-			status = row.find('INTRANSIT_STATUS').string.strip()
-			date_time = datetime.strptime(' '.join([date,time]),"%d-%b-%Y %H:%M")
+		def text(row,name):
+			element = row.find(name)
+			return element.string if element is not None else None
 
-			self.tracking_data.append({'status':status,'date':date_time,'location':location})
+		rows = [(row.find('INTRANSIT_DATE').string, row.find('INTRANSIT_TIME').string,
+				 text(row,'INTRANSIT_LOCATION'), row.find('INTRANSIT_STATUS').string) for row in soup.findAll('ROW')]
 
-		# Sort the checkpoints based on Date and Time --- this is important
-		self.tracking_data = sorted(self.tracking_data, key=lambda k: k['date'])
+		return soup.find('result').string, text(soup,'DOCKET_STATUS'), rows
+
+	def parse_lxml(self):
+		tree = parsers.xml_tree(self.page)
+		xpath = parsers.xpath
+
+		def text(row,name):
+			element = parsers.first(xpath("descendant-or-self::*[local-name()='{}']".format(name)),row)
+			return parsers.string_of(element) if element is not None else None
+
+		rows = [(parsers.string_of(xpath(".//*[local-name()='INTRANSIT_DATE']")(row)[0]),
+				 parsers.string_of(xpath(".//*[local-name()='INTRANSIT_TIME']")(row)[0]),
+				 text(row,'INTRANSIT_LOCATION'),
+				 parsers.string_of(xpath(".//*[local-name()='INTRANSIT_STATUS']")(row)[0]))
+				for row in xpath("//*[local-name()='ROW']")(tree)]
+
+		return text(tree,'result'), text(tree,'DOCKET_STATUS'), rows
 
 # 7 trackers defined till now! 